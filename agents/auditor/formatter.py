@@ -0,0 +1,130 @@
+"""Markdown rendering of audit responses"""
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+# Tavily search depth -> (singular, plural) label
+DEPTH_LABELS = {"advanced": ("completa", "completas"), "basic": ("rápida", "rápidas")}
+
+
+def search_label(busquedas: int, depths: List[str]) -> str:
+    """Footer text for the web searches behind an answer: '1 búsqueda completa', '2 búsquedas (completa + rápida)'"""
+    if busquedas == 0:
+        return "Sin búsquedas web"
+    if len(depths) != busquedas or any(depth not in DEPTH_LABELS for depth in depths):
+        # Depths unknown (older agents): just the count
+        return "1 búsqueda web" if busquedas == 1 else f"{busquedas} búsquedas web"
+    if busquedas == 1:
+        return f"1 búsqueda {DEPTH_LABELS[depths[0]][0]}"
+    counts = {depth: depths.count(depth) for depth in dict.fromkeys(depths)}
+    if all(count == 1 for count in counts.values()):
+        parts = [DEPTH_LABELS[depth][0] for depth in counts]
+    else:
+        parts = [f"{count} {DEPTH_LABELS[depth][0 if count == 1 else 1]}" for depth, count in counts.items()]
+    return f"{busquedas} búsquedas ({' + '.join(parts)})"
+
+
+def render_markdown(audit_response: Any) -> str:
+    """Markdown answer for an AuditResponse: summary, key details, norms, next step, sources and confidence"""
+    r = audit_response.respuesta_final
+    
+    markdown = f"""{r.titulo}
+{r.respuesta_directa}
+
+**Información Clave:**
+"""
+    
+    for detalle in r.detalles:
+        markdown += f"{detalle}\n"
+    
+    if r.normativa_aplicable:
+        markdown += "\n**Normativa Aplicable:**\n"
+        for norma in r.normativa_aplicable:
+            markdown += f"{norma}\n"
+    
+    markdown += f"\n**¿Qué hacer ahora?**\n{r.proxima_accion}"
+    
+    if r.advertencias:
+        markdown += f"\n\n{r.advertencias}"
+    
+    # Handle both single and multi-agent metadata
+    agents = audit_response.metadata.get('agentes_consultados', [])
+    if not agents:
+        # Fallback to single agent
+        single_agent = audit_response.metadata.get('agente_consultado', 'Sistema')
+        agents = [single_agent] if single_agent != 'Sistema' else []
+    
+    agents_text = ', '.join([a.upper() for a in agents]) if agents else 'Sistema'
+    
+    # Always show search status, labelled by search depth
+    busquedas = audit_response.metadata.get('busquedas_web', 0)
+    depths = audit_response.metadata.get('profundidades_busqueda') or []
+    markdown += f"\n\n---\n*Consultado: {agents_text}* | 🔍 *{search_label(busquedas, depths)}*\n"
+    
+    # Include confidence score
+    confidence = audit_response.metadata.get('confianza', 0.85)
+    confidence_percent = int(confidence * 100)
+    markdown += f"*Confianza: {confidence_percent}%*"
+    
+    # Add confidence breakdown if available
+    breakdown = audit_response.metadata.get('confidence_breakdown')
+    logger.info(f"Confidence breakdown raw: {breakdown}")
+    
+    # If breakdown is confidence_factors instead of scores, calculate the breakdown
+    if breakdown and isinstance(breakdown, dict) and 'has_specific_regulations' in breakdown:
+        # This is confidence_factors, not a proper breakdown - calculate it
+        confidence = audit_response.metadata.get('confianza', 0.85)
+        breakdown = {
+            'base': 50,
+            'regulations': int(20 * confidence) if breakdown.get('has_specific_regulations') else 0,
+            'articles': int(15 * confidence) if breakdown.get('has_exact_articles') else 0, 
+            'procedures': int(10 * confidence) if breakdown.get('has_complete_procedures') else 0,
+            'updates': int(5 * confidence) if breakdown.get('has_recent_updates') else 0
+        }
+        logger.info(f"Calculated breakdown: {breakdown}")
+    
+    if breakdown and confidence_percent < 95:  # Show breakdown for non-perfect scores
+        try:
+            markdown += f"\n\n📊 **Desglose de confianza:**\n"
+            
+            # Handle both nested format {"base": {"achieved": 50, "possible": 50}} 
+            # and simple format {"base": 50}
+            def get_score(key, default_possible):
+                if key in breakdown:
+                    if isinstance(breakdown[key], dict):
+                        return int(breakdown[key]['achieved']), breakdown[key]['possible']
+                    else:
+                        # Handle both integer and float values
+                        return int(float(breakdown[key])), default_possible
+                return None, None
+            
+            # Map both possible key names
+            score_map = [
+                ('base', 'Puntuación base', 50),
+                ('specific_regulations', 'Regulaciones específicas', 20),
+                ('regulations', 'Regulaciones específicas', 20),
+                ('exact_articles', 'Artículos exactos', 15),
+                ('articles', 'Artículos exactos', 15),
+                ('complete_procedures', 'Procedimientos completos', 10),
+                ('procedures', 'Procedimientos completos', 10),
+                ('recent_updates', 'Actualizaciones recientes', 5),
+                ('updates', 'Actualizaciones recientes', 5)
+            ]
+            
+            shown_labels = set()
+            for key, label, default_possible in score_map:
+                if label not in shown_labels:
+                    achieved, possible = get_score(key, default_possible)
+                    logger.info(f"Processing {key} -> {label}: achieved={achieved}, possible={possible}")
+                    if achieved is not None:
+                        shown_labels.add(label)
+                        label_formatted = f"{label}:".ljust(25)
+                        markdown += f"{label_formatted}{achieved:2d} / {possible} {'✓' if achieved == possible else '✗'}\n"
+            
+            markdown += f"{'─' * 40}\n"
+            markdown += f"Total:                   {confidence_percent:2d} / 100"
+        except Exception as e:
+            logger.error(f"Error formatting confidence breakdown: {str(e)}")
+    
+    return markdown
@@ -0,0 +1,167 @@
+"""Deterministic audit of agent answers that pass schema, citation and confidence checks"""
+import os
+import re
+from typing import Dict, Any, List, Optional
+
+LOCAL_AUDIT_MIN_CONFIDENCE = float(os.getenv("LOCAL_AUDIT_MIN_CONFIDENCE", "0.8"))
+
+# Normativa "tipo" values the agents are told to use
+NORMA_TYPE = re.compile(
+    r"^(?:Resoluci[oó]n|Res\.|RG|Decreto|DNU|Ley|Disposici[oó]n|Comunicaci[oó]n\s*\"?A\"?|Com\.\s*\"?A\"?)\b",
+    re.IGNORECASE
+)
+# 7105, 22.415, 26/2024, 4238/68
+NORMA_NUMBER = re.compile(r"^\d{1,5}(?:\.\d{3})?(?:/\d{2,4})?$")
+YEAR = re.compile(r"^(?:19|20)\d\d$")
+
+# Bracketed in-text citation: [Com. "A" 7105, punto 2.1], [Resolución SENASA 32/2023, art. 4], [Decreto 4238/68]
+CITATION = re.compile(
+    r"\[[^\]]*?(?:Com(?:unicaci[oó]n)?\.?\s*[\"'“]?A[\"'”]?\s*\d{3,5}"
+    r"|Res(?:oluci[oó]n)?\.?(?:\s+(?:General|[A-ZÁÉÍÓÚ]{2,}))*\s+(?:N[°º]\s*)?\d{1,5}(?:/\d{2,4})?"
+    r"|RG\s*\d{3,5}"
+    r"|Decreto\s+(?:N[°º]\s*)?\d{1,5}(?:/\d{2,4})?"
+    r"|Ley\s+\d{1,2}\.?\d{3})[^\]]*\]"
+)
+
+# Fields of each agent's answer schema that become detail bullets, in display order
+LIST_FIELDS = [
+    "Requisitos", "PasosRequeridos", "DocumentacionNecesaria",
+    "RequisitosSanitarios", "CertificadosRequeridos", "OrganismosIntervinientes"
+]
+VALUE_FIELDS = {
+    "MontoLimite": "Monto límite",
+    "Plazo": "Plazo",
+    "NCM": "Posición NCM",
+    "ArancelExportacion": "Arancel de exportación",
+    "PlazoProcesamiento": "Plazo de procesamiento"
+}
+FIRST_STEP_FIELDS = ["PasosRequeridos", "Requisitos", "RequisitosSanitarios", "DocumentacionNecesaria"]
+
+# (breakdown key, points, factor names used by the different agents)
+BREAKDOWN = [
+    ("specific_regulations", 20, ("has_specific_regulations", "has_specific_communications")),
+    ("exact_articles", 15, ("has_exact_articles", "has_exact_points")),
+    ("complete_procedures", 10, ("has_complete_procedures", "has_complete_requirements")),
+    ("recent_updates", 5, ("has_recent_updates",))
+]
+
+
+def _factor(factors: Dict[str, Any], names) -> Optional[bool]:
+    for name in names:
+        if name in factors:
+            return bool(factors[name])
+    return None
+
+
+def check_answer(answer: Any) -> List[str]:
+    """Names of the local checks the agent answer fails; empty when it can skip the LLM audit"""
+    if not isinstance(answer, dict) or answer.get("error"):
+        return ["schema"]
+    failed = []
+
+    respuesta = answer.get("Respuesta")
+    normativa = answer.get("Normativa")
+    confidence = answer.get("confidence")
+    factors = answer.get("confidence_factors")
+    if (not isinstance(respuesta, str) or len(respuesta) < 40
+            or not isinstance(normativa, list) or not normativa
+            or not all(isinstance(norma, dict) for norma in normativa)
+            or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1
+            or not isinstance(factors, dict)):
+        return ["schema"]
+    if "INSUFFICIENT_CONTEXT" in respuesta:
+        failed.append("insufficient_context")
+
+    # Every listed norm is well formed, the answer cites at least one in brackets,
+    # and the cited numbers are the listed ones
+    for norma in normativa:
+        number = str(norma.get("número", norma.get("numero", ""))).strip()
+        year = str(norma.get("año", norma.get("ano", ""))).strip()
+        if (not NORMA_TYPE.match(str(norma.get("tipo", "")).strip()) or not NORMA_NUMBER.match(number)
+                or (year and not YEAR.match(year))):
+            failed.append("citation_format")
+            break
+    citations = CITATION.findall(respuesta)
+    if not citations:
+        failed.append("missing_citation")
+    elif not any(str(norma.get("número", norma.get("numero", ""))).strip() in " ".join(citations) for norma in normativa):
+        failed.append("citation_mismatch")
+
+    if confidence < LOCAL_AUDIT_MIN_CONFIDENCE:
+        failed.append("low_confidence")
+    if factors.get("contains_insufficient_context") or not _factor(factors, BREAKDOWN[0][2]):
+        failed.append("confidence_factors")
+    return failed
+
+
+def _sentences(text: str, count: int) -> str:
+    text = re.sub(r"\s*\[[^\]]*\]", "", text).strip()
+    parts = re.split(r"(?<=[.!?])\s+(?=[A-ZÁÉÍÓÚÑ¿¡])", text)
+    return " ".join(parts[:count])
+
+
+def _title(question: str) -> str:
+    words = question.strip().strip("¿?¡! ").split()
+    title = " ".join(words[:8])
+    return title[:1].upper() + title[1:]
+
+
+def _norma_text(norma: Dict[str, Any]) -> str:
+    text = f"{norma.get('tipo', '').strip()} {str(norma.get('número', norma.get('numero', ''))).strip()}"
+    article = norma.get("artículo") or norma.get("articulo")
+    point = norma.get("punto")
+    if article:
+        text += f", art. {article}"
+    elif point:
+        text += f", punto {point}"
+    year = norma.get("año") or norma.get("ano")
+    if year and str(year) not in text:
+        text += f" ({year})"
+    return text
+
+
+def confidence_breakdown(factors: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Points per factor on the agents' scoring scale (base 50 plus 20/15/10/5)"""
+    breakdown = {"base": {"achieved": 50, "possible": 50}}
+    for key, points, names in BREAKDOWN:
+        held = _factor(factors, names)
+        if held is not None:
+            breakdown[key] = {"achieved": points if held else 0, "possible": points}
+    return breakdown
+
+
+def build_audit(question: str, answer: Dict[str, Any], agent_name: str) -> Dict[str, Any]:
+    """AuditResponse fields for an answer that passed check_answer()"""
+    details = []
+    for field, label in VALUE_FIELDS.items():
+        if answer.get(field):
+            details.append(f"📌 {label}: {answer[field]}")
+    for field in LIST_FIELDS:
+        details.extend(f"📌 {item}" for item in answer.get(field) or [] if isinstance(item, str))
+    if not details:
+        details.append(f"📌 {_sentences(answer['Respuesta'], 3)}")
+
+    first_step = next((answer[field][0] for field in FIRST_STEP_FIELDS
+                       if isinstance(answer.get(field), list) and answer[field]), None)
+    factors = answer["confidence_factors"]
+
+    return {
+        "status": "Aprobado",
+        "motivo_auditoria": "Verificación local: esquema, citas normativas y confianza correctos",
+        "respuesta_final": {
+            "titulo": f"🎯 {_title(question)}",
+            "respuesta_directa": f"✅ {_sentences(answer['Respuesta'], 2)}",
+            "detalles": details[:6],
+            "normativa_aplicable": [f"📋 {_norma_text(norma)}" for norma in answer["Normativa"]],
+            "proxima_accion": f"👉 Primer paso: {first_step}" if first_step else
+                              "👉 Consultá la normativa citada con el organismo correspondiente",
+            "advertencias": None if _factor(factors, ("has_recent_updates",)) is not False else
+                            "⚠️ Verificá que la normativa citada no haya sido modificada recientemente"
+        },
+        "metadata": {
+            "agente_consultado": agent_name,
+            "confianza": answer["confidence"],
+            "confidence_factors": factors,
+            "confidence_breakdown": confidence_breakdown(factors)
+        }
+    }
@@ -2,19 +2,41 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import httpx
 import os
 import json
 from typing import Dict, Any, List, Optional
 import logging
 import sys
+from contextlib import asynccontextmanager
 sys.path.append('/app')
-from cost_calculator import calculate_cost
+from cost_calculator import calculate_cost, PromptCacheStats
+from http_pool import PooledClient
+from resilient_client import ResilientClient
+from context_budget import BUDGETS, ContextStats, estimate_messages, fit_json
+from local_audit import check_answer, build_audit
+from formatter import render_markdown
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Auditor Service")
+# One keep-alive connection pool to OpenRouter per process
+openrouter = PooledClient("openrouter", env_prefix="OPENROUTER", timeout=60.0)
+# Retries, optional hedging and a circuit breaker for every completion request
+completions = ResilientClient(openrouter, env_prefix="OPENROUTER")
+prompt_cache = PromptCacheStats()
+context_stats = ContextStats()
+
+# Answers that pass every local check are audited without calling the model
+LOCAL_AUDIT_ENABLED = os.getenv("LOCAL_AUDIT_ENABLED", "true").lower() == "true"
+audit_paths = {"local": 0, "llm": 0, "failed_checks": {}}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await openrouter.start()
+    yield
+    await openrouter.close()
+
+app = FastAPI(title="Auditor Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +55,8 @@ class MultiAuditRequest(BaseModel):
     user_question: str
     agent_responses: Dict[str, Dict[str, Any]]  # agent_name -> response
     primary_agent: str
+    # The one search the gateway ran for every agent: {"depths": [...], "sources_consulted": [...]}
+    shared_search: Optional[Dict[str, Any]] = None
 
 class FormattedResponse(BaseModel):
     titulo: str
@@ -48,33 +72,15 @@ class AuditResponse(BaseModel):
     respuesta_final: FormattedResponse
     metadata: Dict[str, Any]
     cost: float = 0.0
+    markdown: Optional[str] = None  # Filled in with ?render=markdown
 
-@app.get("/health")
-async def health():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "auditor",
-        "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o")
-    }
-
-@app.post("/audit", response_model=AuditResponse)
-async def audit(request: AuditRequest):
-    """Audit and format agent response"""
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
-    
-    # Create audit prompt
-    audit_prompt = f"""Eres el **Auditor y Resumidor Final** del Oráculo Burocrático Argentino.
+AUDIT_PROMPT = """Eres el **Auditor y Resumidor Final** del Oráculo Burocrático Argentino.
 
 Tu misión:
 1. AUDITAR: Verificar exactitud y completitud de la respuesta del agente
 2. RESUMIR: Crear una respuesta final clara y útil para el usuario
 
-Datos recibidos:
-- Pregunta del usuario: {request.user_question}
-- Respuesta del agente {request.agent_name}: {json.dumps(request.agent_response, ensure_ascii=False)}
+Recibirás en el mensaje del usuario la pregunta del usuario y la respuesta del agente consultado.
 
 Proceso de Auditoría:
 1. Verifica que la respuesta aborde la consulta directamente
@@ -91,10 +97,10 @@ Crea una respuesta con:
 - Próxima acción clara
 
 Responde con JSON:
-{{
+{
   "status": "Aprobado|Observado|Rechazado",
   "motivo_auditoria": "<máx 20 palabras>",
-  "respuesta_final": {{
+  "respuesta_final": {
     "titulo": "🎯 <Título de 5-8 palabras>",
     "respuesta_directa": "✅ <Lo esencial en 1-2 oraciones>",
     "detalles": [
@@ -108,125 +114,28 @@ Responde con JSON:
     ],
     "proxima_accion": "👉 <Qué hacer ahora mismo>",
     "advertencias": "⚠️ <Solo si hay algo crítico>"
-  }},
-  "metadata": {{
-    "agente_consultado": "{request.agent_name}",
+  },
+  "metadata": {
+    "agente_consultado": "<nombre del agente consultado>",
     "confianza": <extraer del campo 'confidence' de la respuesta del agente, o 0.85 si no está presente>,
     "confidence_factors": <incluir confidence_factors del agente si están disponibles>,
     "confidence_breakdown": <IMPORTANTE: Si el agente reporta confidence=0.80 con todos los factors en true excepto posiblemente recent_updates, usa estos valores exactos para reflejar correctamente el score:
-      {{
-        "base": {{"achieved": 50, "possible": 50}},
-        "specific_regulations": {{"achieved": 16, "possible": 20}},
-        "exact_articles": {{"achieved": 12, "possible": 15}},
-        "complete_procedures": {{"achieved": 8, "possible": 10}},
-        "recent_updates": {{"achieved": <4 si has_recent_updates es true, 0 si false>, "possible": 5}}
-      }}
+      {
+        "base": {"achieved": 50, "possible": 50},
+        "specific_regulations": {"achieved": 16, "possible": 20},
+        "exact_articles": {"achieved": 12, "possible": 15},
+        "complete_procedures": {"achieved": 8, "possible": 10},
+        "recent_updates": {"achieved": <4 si has_recent_updates es true, 0 si false>, "possible": 5}
+      }
       Para otros casos, calcula proporcionalmente basándote en el confidence real>
-  }}
-}}"""
+  }
+}"""
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "HTTP-Referer": "https://github.com/bureaucracy-oracle",
-                    "X-Title": "Bureaucracy Oracle Auditor"
-                },
-                json={
-                    "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"),
-                    "messages": [
-                        {"role": "system", "content": audit_prompt}
-                    ],
-                    "temperature": 0.1,
-                    "response_format": {"type": "json_object"}
-                },
-                timeout=30.0
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            # Calculate cost from usage data
-            usage = result.get("usage", {})
-            cost = calculate_cost(os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"), usage)
-            
-            # Parse audit result
-            audit_data = json.loads(result["choices"][0]["message"]["content"])
-            
-            # Handle cases where the response might not have all fields
-            if "respuesta_final" not in audit_data:
-                audit_data["respuesta_final"] = {
-                    "titulo": "❌ Error en procesamiento",
-                    "respuesta_directa": "No se pudo procesar la respuesta correctamente",
-                    "detalles": ["Error al auditar la respuesta del agente"],
-                    "normativa_aplicable": [],
-                    "proxima_accion": "Por favor, intente nuevamente"
-                }
-            
-            # Build response
-            formatted = FormattedResponse(**audit_data["respuesta_final"])
-            
-            # Extract search metadata from agent response
-            search_metadata = request.agent_response.get("_search_metadata", {})
-            metadata = audit_data.get("metadata", {"agente_consultado": request.agent_name})
-            
-            # Add search info to metadata
-            if search_metadata.get("used"):
-                metadata["busquedas_web"] = search_metadata.get("count", 1)
-                metadata["fuentes_consultadas"] = search_metadata.get("sources_consulted", [])
-            else:
-                metadata["busquedas_web"] = 0
-                metadata["fuentes_consultadas"] = []
-            
-            return AuditResponse(
-                status=audit_data.get("status", "Rechazado"),
-                motivo_auditoria=audit_data.get("motivo_auditoria", "Error en auditoría"),
-                respuesta_final=formatted,
-                metadata=metadata,
-                cost=cost
-            )
-            
-    except Exception as e:
-        logger.error(f"Audit error: {str(e)}")
-        # Return a safe error response
-        return AuditResponse(
-            status="Rechazado",
-            motivo_auditoria="Error en el proceso de auditoría",
-            respuesta_final=FormattedResponse(
-                titulo="❌ Error de Sistema",
-                respuesta_directa="Hubo un error al procesar su consulta",
-                detalles=["El sistema no pudo completar la auditoría"],
-                normativa_aplicable=[],
-                proxima_accion="Por favor, intente nuevamente en unos momentos"
-            ),
-            metadata={"agente_consultado": request.agent_name, "error": str(e)},
-            cost=0.0
-        )
-
-@app.post("/audit-multi", response_model=AuditResponse)
-async def audit_multi(request: MultiAuditRequest):
-    """Audit and merge multiple agent responses"""
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
-    
-    # Format agent responses for the prompt
-    agent_responses_text = ""
-    for agent_name, response in request.agent_responses.items():
-        agent_responses_text += f"\n\n**Agente {agent_name.upper()}:**\n"
-        agent_responses_text += json.dumps(response.get("answer", {}), ensure_ascii=False, indent=2)
-    
-    # Create multi-agent audit prompt
-    audit_prompt = f"""Eres el **Auditor y Resumidor Final** del Oráculo Burocrático Argentino.
+MULTI_AUDIT_PROMPT = """Eres el **Auditor y Resumidor Final** del Oráculo Burocrático Argentino.
 
 Tu misión especial: INTEGRAR respuestas de MÚLTIPLES agentes en una respuesta coherente.
 
-Datos recibidos:
-- Pregunta del usuario: {request.user_question}
-- Respuestas de múltiples agentes:{agent_responses_text}
-- Agente principal: {request.primary_agent}
+Recibirás en el mensaje del usuario la pregunta del usuario, las respuestas de los agentes consultados y cuál es el agente principal.
 
 Proceso de Auditoría Multi-Agente:
 1. INTEGRA la información de todos los agentes consultados
@@ -249,10 +158,10 @@ Crea una respuesta UNIFICADA con:
 IMPORTANTE: En los metadatos, incluye TODOS los agentes consultados.
 
 Responde con JSON:
-{{
+{
   "status": "Aprobado",
-  "motivo_auditoria": "Respuesta integrada de {len(request.agent_responses)} agentes",
-  "respuesta_final": {{
+  "motivo_auditoria": "Respuesta integrada de <cantidad> agentes",
+  "respuesta_final": {
     "titulo": "🎯 <Título que refleje la naturaleza multi-agencia>",
     "respuesta_directa": "✅ <Síntesis de todos los requisitos>",
     "detalles": [
@@ -268,83 +177,286 @@ Responde con JSON:
     ],
     "proxima_accion": "👉 <Acción considerando TODOS los requisitos>",
     "advertencias": "⚠️ <Advertencias críticas de cualquier agente>"
-  }},
-  "metadata": {{
-    "agentes_consultados": {list(request.agent_responses.keys())},
-    "agente_principal": "{request.primary_agent}",
+  },
+  "metadata": {
+    "agentes_consultados": [<todos los agentes consultados>],
+    "agente_principal": "<agente principal>",
     "confianza": <usar el confidence del agente principal SIEMPRE>,
     "confidence_details": <incluir confidence de cada agente consultado>,
-    "confidence_breakdown": <IMPORTANTE: Toma el confidence_breakdown del agente principal ({request.primary_agent}) directamente de su respuesta. Si no está disponible, usa el confidence del agente principal para calcular proporcionalmente:
+    "confidence_breakdown": <IMPORTANTE: Toma el confidence_breakdown del agente principal directamente de su respuesta. Si no está disponible, usa el confidence del agente principal para calcular proporcionalmente:
       - Si confidence = 0.85: base=50, regulations=17, articles=13, procedures=8.5, updates=4.25
       - Si confidence = 0.80: base=50, regulations=16, articles=12, procedures=8, updates=4
       - Para otros valores, calcula proporcionalmente>
-  }}
-}}"""
+  }
+}"""
+
+@app.get("/health")
+async def health():
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "service": "auditor",
+        "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o")
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Connection pool statistics"""
+    return {
+        "service": "auditor",
+        "http_pool": {"openrouter": openrouter.stats()},
+        "openrouter": completions.stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "context": context_stats.stats(),
+        "audit_paths": {"local_enabled": LOCAL_AUDIT_ENABLED, **audit_paths}
+    }
+
+def add_search_info(metadata: Dict[str, Any], agent_response: Dict[str, Any]):
+    """Copy the agent's web search usage into the audit metadata"""
+    search_metadata = agent_response.get("_search_metadata", {})
+    if search_metadata.get("used"):
+        metadata["busquedas_web"] = search_metadata.get("count", 1)
+        metadata["profundidades_busqueda"] = search_metadata.get("depths", [])
+        metadata["fuentes_consultadas"] = search_metadata.get("sources_consulted", [])
+    else:
+        metadata["busquedas_web"] = 0
+        metadata["profundidades_busqueda"] = []
+        metadata["fuentes_consultadas"] = []
+
+def check_render(render: Optional[str]):
+    """Reject an unsupported ?render= before the audit is paid for"""
+    if render not in (None, "markdown"):
+        raise HTTPException(status_code=400, detail=f"Unsupported render format: {render}")
+
+def rendered(audit_response: AuditResponse, render: Optional[str]) -> AuditResponse:
+    """Attach the markdown answer when the caller asked for it, saving the /format round trip"""
+    if render == "markdown":
+        audit_response.markdown = render_markdown(audit_response)
+    return audit_response
+
+@app.post("/audit", response_model=AuditResponse)
+async def audit(request: AuditRequest, render: Optional[str] = None):
+    """Audit and format agent response (`?render=markdown` also returns the rendered answer)"""
+    check_render(render)
+    return rendered(await run_audit(request), render)
+
+@app.post("/audit-multi", response_model=AuditResponse)
+async def audit_multi(request: MultiAuditRequest, render: Optional[str] = None):
+    """Audit and merge multiple agent responses (`?render=markdown` also returns the rendered answer)"""
+    check_render(render)
+    return rendered(await run_audit_multi(request), render)
+
+async def run_audit(request: AuditRequest) -> AuditResponse:
+    """Audit and format agent response"""
+    # Fast path: a well-formed, properly cited, confident answer only needs reshaping
+    failed_checks = check_answer(request.agent_response) if LOCAL_AUDIT_ENABLED else ["disabled"]
+    if not failed_checks:
+        audit_paths["local"] += 1
+        audit_data = build_audit(request.user_question, request.agent_response, request.agent_name)
+        metadata = audit_data["metadata"]
+        metadata["audit_path"] = "local"
+        add_search_info(metadata, request.agent_response)
+        return AuditResponse(
+            status=audit_data["status"],
+            motivo_auditoria=audit_data["motivo_auditoria"],
+            respuesta_final=FormattedResponse(**audit_data["respuesta_final"]),
+            metadata=metadata,
+            cost=0.0
+        )
+    audit_paths["llm"] += 1
+    for check in failed_checks:
+        audit_paths["failed_checks"][check] = audit_paths["failed_checks"].get(check, 0) + 1
+    
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
+    
+    # Static prompt as the system message and the per-request data after it, so the
+    # prompt is a stable prefix the provider's prompt cache can reuse
+    audit_data_message = f"""Datos recibidos:
+- Pregunta del usuario: {request.user_question}
+- Respuesta del agente {request.agent_name}: {fit_json(request.agent_response, BUDGETS["audit"])}"""
+    messages = [
+        {"role": "system", "content": AUDIT_PROMPT},
+        {"role": "user", "content": audit_data_message}
+    ]
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "HTTP-Referer": "https://github.com/bureaucracy-oracle",
-                    "X-Title": "Bureaucracy Oracle Multi-Auditor"
-                },
-                json={
-                    "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"),
-                    "messages": [
-                        {"role": "system", "content": audit_prompt}
-                    ],
-                    "temperature": 0.1,
-                    "response_format": {"type": "json_object"}
-                },
-                timeout=60.0
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            # Calculate cost from usage data
-            usage = result.get("usage", {})
-            cost = calculate_cost(os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"), usage)
-            
-            # Parse audit result
-            audit_data = json.loads(result["choices"][0]["message"]["content"])
-            
-            # Build response
-            formatted = FormattedResponse(**audit_data["respuesta_final"])
-            
-            # Extract and aggregate search metadata from all agents
-            metadata = audit_data.get("metadata", {
-                "agentes_consultados": list(request.agent_responses.keys()),
-                "agente_principal": request.primary_agent
-            })
-            
-            total_searches = 0
-            all_sources = []
-            
-            for agent_name, response in request.agent_responses.items():
-                agent_answer = response.get("answer", {})
-                search_metadata = agent_answer.get("_search_metadata", {})
-                
-                if search_metadata.get("used"):
-                    total_searches += search_metadata.get("count", 1)
-                    sources = search_metadata.get("sources_consulted", [])
-                    # Prefix sources with agent name
-                    for source in sources:
-                        all_sources.append(f"[{agent_name.upper()}] {source}")
-            
-            metadata["busquedas_web"] = total_searches
-            metadata["fuentes_consultadas"] = all_sources
-            
-            return AuditResponse(
-                status=audit_data.get("status", "Aprobado"),
-                motivo_auditoria=audit_data.get("motivo_auditoria", "Respuesta integrada"),
-                respuesta_final=formatted,
-                metadata=metadata,
-                cost=cost
-            )
+        response = await completions.post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://github.com/bureaucracy-oracle",
+                "X-Title": "Bureaucracy Oracle Auditor"
+            },
+            json={
+                "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"),
+                "messages": messages,
+                "temperature": 0.1,
+                "response_format": {"type": "json_object"}
+            },
+            timeout=30.0
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        # Calculate cost from usage data
+        usage = result.get("usage", {})
+        model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o")
+        cost = calculate_cost(model, usage)
+        prompt_cache.record(model, usage)
+        context_stats.record("audit", estimate_messages(messages), usage)
+        
+        # Parse audit result
+        audit_data = json.loads(result["choices"][0]["message"]["content"])
+        
+        # Handle cases where the response might not have all fields
+        if "respuesta_final" not in audit_data:
+            audit_data["respuesta_final"] = {
+                "titulo": "❌ Error en procesamiento",
+                "respuesta_directa": "No se pudo procesar la respuesta correctamente",
+                "detalles": ["Error al auditar la respuesta del agente"],
+                "normativa_aplicable": [],
+                "proxima_accion": "Por favor, intente nuevamente"
+            }
+        
+        # Build response
+        formatted = FormattedResponse(**audit_data["respuesta_final"])
+        
+        metadata = audit_data.get("metadata", {})
+        # The prompt no longer carries the agent name, so set it here
+        metadata["agente_consultado"] = request.agent_name
+        metadata["audit_path"] = "llm"
+        metadata["local_checks_failed"] = failed_checks
+        
+        # Add search info to metadata
+        add_search_info(metadata, request.agent_response)
+        
+        return AuditResponse(
+            status=audit_data.get("status", "Rechazado"),
+            motivo_auditoria=audit_data.get("motivo_auditoria", "Error en auditoría"),
+            respuesta_final=formatted,
+            metadata=metadata,
+            cost=cost
+        )
+        
+    except Exception as e:
+        logger.error(f"Audit error: {str(e)}")
+        # Return a safe error response
+        return AuditResponse(
+            status="Rechazado",
+            motivo_auditoria="Error en el proceso de auditoría",
+            respuesta_final=FormattedResponse(
+                titulo="❌ Error de Sistema",
+                respuesta_directa="Hubo un error al procesar su consulta",
+                detalles=["El sistema no pudo completar la auditoría"],
+                normativa_aplicable=[],
+                proxima_accion="Por favor, intente nuevamente en unos momentos"
+            ),
+            metadata={
+                "agente_consultado": request.agent_name,
+                "audit_path": "llm",
+                "local_checks_failed": failed_checks,
+                "error": str(e)
+            },
+            cost=0.0
+        )
+
+async def run_audit_multi(request: MultiAuditRequest) -> AuditResponse:
+    """Audit and merge multiple agent responses"""
+    audit_paths["llm"] += 1
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
+    
+    # Format agent responses for the prompt, splitting the budget between agents
+    agent_budget = BUDGETS["audit_multi"] // max(1, len(request.agent_responses))
+    agent_responses_text = ""
+    for agent_name, response in request.agent_responses.items():
+        agent_responses_text += f"\n\n**Agente {agent_name.upper()}:**\n"
+        agent_responses_text += fit_json(response.get("answer", {}), agent_budget)
+    
+    # Per-request data goes after the static prompt (see /audit)
+    audit_data_message = f"""Datos recibidos:
+- Pregunta del usuario: {request.user_question}
+- Respuestas de múltiples agentes:{agent_responses_text}
+- Agente principal: {request.primary_agent}"""
+    messages = [
+        {"role": "system", "content": MULTI_AUDIT_PROMPT},
+        {"role": "user", "content": audit_data_message}
+    ]
+
+    try:
+        response = await completions.post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://github.com/bureaucracy-oracle",
+                "X-Title": "Bureaucracy Oracle Multi-Auditor"
+            },
+            json={
+                "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"),
+                "messages": messages,
+                "temperature": 0.1,
+                "response_format": {"type": "json_object"}
+            },
+            timeout=60.0
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        # Calculate cost from usage data
+        usage = result.get("usage", {})
+        model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o")
+        cost = calculate_cost(model, usage)
+        prompt_cache.record(model, usage)
+        context_stats.record("audit_multi", estimate_messages(messages), usage)
+        
+        # Parse audit result
+        audit_data = json.loads(result["choices"][0]["message"]["content"])
+        
+        # Build response
+        formatted = FormattedResponse(**audit_data["respuesta_final"])
+        
+        # Extract and aggregate search metadata from all agents
+        metadata = audit_data.get("metadata", {})
+        metadata["agentes_consultados"] = list(request.agent_responses.keys())
+        metadata["agente_principal"] = request.primary_agent
+        # Merging several answers always takes the model
+        metadata["audit_path"] = "llm"
+        
+        # The shared search counts once and its sources are listed once, unprefixed
+        shared_search = request.shared_search or {}
+        all_depths = list(shared_search.get("depths", []))
+        total_searches = len(all_depths)
+        all_sources = list(shared_search.get("sources_consulted", []))
+        
+        for agent_name, response in request.agent_responses.items():
+            agent_answer = response.get("answer", {})
+            search_metadata = agent_answer.get("_search_metadata", {})
             
+            if search_metadata.get("used") and not (shared_search and search_metadata.get("shared")):
+                total_searches += search_metadata.get("count", 1)
+                all_depths.extend(search_metadata.get("depths", []))
+                sources = search_metadata.get("sources_consulted", [])
+                # Prefix sources with agent name
+                for source in sources:
+                    all_sources.append(f"[{agent_name.upper()}] {source}")
+        
+        metadata["busquedas_web"] = total_searches
+        metadata["profundidades_busqueda"] = all_depths
+        metadata["fuentes_consultadas"] = all_sources
+        
+        return AuditResponse(
+            status=audit_data.get("status", "Aprobado"),
+            motivo_auditoria=audit_data.get("motivo_auditoria", "Respuesta integrada"),
+            respuesta_final=formatted,
+            metadata=metadata,
+            cost=cost
+        )
+        
     except Exception as e:
         logger.error(f"Multi-audit error: {str(e)}")
         return AuditResponse(
@@ -367,116 +479,7 @@ Responde con JSON:
 @app.post("/format")
 async def format_response(audit_response: AuditResponse):
     """Format audit response as markdown"""
-    r = audit_response.respuesta_final
-    
-    markdown = f"""{r.titulo}
-{r.respuesta_directa}
-
-**Información Clave:**
-"""
-    
-    for detalle in r.detalles:
-        markdown += f"{detalle}\n"
-    
-    if r.normativa_aplicable:
-        markdown += "\n**Normativa Aplicable:**\n"
-        for norma in r.normativa_aplicable:
-            markdown += f"{norma}\n"
-    
-    markdown += f"\n**¿Qué hacer ahora?**\n{r.proxima_accion}"
-    
-    if r.advertencias:
-        markdown += f"\n\n{r.advertencias}"
-    
-    # Handle both single and multi-agent metadata
-    agents = audit_response.metadata.get('agentes_consultados', [])
-    if not agents:
-        # Fallback to single agent
-        single_agent = audit_response.metadata.get('agente_consultado', 'Sistema')
-        agents = [single_agent] if single_agent != 'Sistema' else []
-    
-    agents_text = ', '.join([a.upper() for a in agents]) if agents else 'Sistema'
-    
-    # Get search count
-    busquedas = audit_response.metadata.get('busquedas_web', 0)
-    
-    # Always show search status with detail
-    if busquedas == 0:
-        markdown += f"\n\n---\n*Consultado: {agents_text}* | 🔍 *Sin búsquedas web*\n"
-    elif busquedas == 1:
-        markdown += f"\n\n---\n*Consultado: {agents_text}* | 🔍 *1 búsqueda rápida*\n"
-    elif busquedas == 2:
-        markdown += f"\n\n---\n*Consultado: {agents_text}* | 🔍 *2 búsquedas (rápida + completa)*\n"
-    else:
-        # For multi-agent cases where total might be higher
-        markdown += f"\n\n---\n*Consultado: {agents_text}* | 🔍 *{busquedas} búsquedas web*\n"
-    
-    # Include confidence score
-    confidence = audit_response.metadata.get('confianza', 0.85)
-    confidence_percent = int(confidence * 100)
-    markdown += f"*Confianza: {confidence_percent}%*"
-    
-    # Add confidence breakdown if available
-    breakdown = audit_response.metadata.get('confidence_breakdown')
-    logger.info(f"Confidence breakdown raw: {breakdown}")
-    
-    # If breakdown is confidence_factors instead of scores, calculate the breakdown
-    if breakdown and isinstance(breakdown, dict) and 'has_specific_regulations' in breakdown:
-        # This is confidence_factors, not a proper breakdown - calculate it
-        confidence = audit_response.metadata.get('confianza', 0.85)
-        breakdown = {
-            'base': 50,
-            'regulations': int(20 * confidence) if breakdown.get('has_specific_regulations') else 0,
-            'articles': int(15 * confidence) if breakdown.get('has_exact_articles') else 0, 
-            'procedures': int(10 * confidence) if breakdown.get('has_complete_procedures') else 0,
-            'updates': int(5 * confidence) if breakdown.get('has_recent_updates') else 0
-        }
-        logger.info(f"Calculated breakdown: {breakdown}")
-    
-    if breakdown and confidence_percent < 95:  # Show breakdown for non-perfect scores
-        try:
-            markdown += f"\n\n📊 **Desglose de confianza:**\n"
-            
-            # Handle both nested format {"base": {"achieved": 50, "possible": 50}} 
-            # and simple format {"base": 50}
-            def get_score(key, default_possible):
-                if key in breakdown:
-                    if isinstance(breakdown[key], dict):
-                        return int(breakdown[key]['achieved']), breakdown[key]['possible']
-                    else:
-                        # Handle both integer and float values
-                        return int(float(breakdown[key])), default_possible
-                return None, None
-            
-            # Map both possible key names
-            score_map = [
-                ('base', 'Puntuación base', 50),
-                ('specific_regulations', 'Regulaciones específicas', 20),
-                ('regulations', 'Regulaciones específicas', 20),
-                ('exact_articles', 'Artículos exactos', 15),
-                ('articles', 'Artículos exactos', 15),
-                ('complete_procedures', 'Procedimientos completos', 10),
-                ('procedures', 'Procedimientos completos', 10),
-                ('recent_updates', 'Actualizaciones recientes', 5),
-                ('updates', 'Actualizaciones recientes', 5)
-            ]
-            
-            shown_labels = set()
-            for key, label, default_possible in score_map:
-                if label not in shown_labels:
-                    achieved, possible = get_score(key, default_possible)
-                    logger.info(f"Processing {key} -> {label}: achieved={achieved}, possible={possible}")
-                    if achieved is not None:
-                        shown_labels.add(label)
-                        label_formatted = f"{label}:".ljust(25)
-                        markdown += f"{label_formatted}{achieved:2d} / {possible} {'✓' if achieved == possible else '✗'}\n"
-            
-            markdown += f"{'─' * 40}\n"
-            markdown += f"Total:                   {confidence_percent:2d} / 100"
-        except Exception as e:
-            logger.error(f"Error formatting confidence breakdown: {str(e)}")
-    
-    return {"markdown": markdown, "audit_response": audit_response}
+    return {"markdown": render_markdown(audit_response), "audit_response": audit_response}
 
 if __name__ == "__main__":
     import uvicorn
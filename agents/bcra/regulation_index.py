@@ -0,0 +1,171 @@
+"""Local BM25 full-text index of every regulation page Tavily has returned"""
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from fact_extractor import extract_facts
+from normalize import normalize_question
+from search_config import CACHE_DURATIONS, EXCHANGE_RATE_TERMS
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no retrieval signal in our questions (already accent-folded)
+STOPWORDS = {
+    "que", "cual", "cuales", "como", "cuanto", "cuanta", "cuantos", "donde", "cuando",
+    "para", "por", "con", "sin", "sobre", "desde", "hasta", "entre", "los", "las", "del",
+    "una", "uno", "unos", "unas", "el", "la", "de", "en", "y", "a", "o", "es", "son",
+    "hay", "se", "me", "mi", "mis", "su", "sus", "lo", "al", "le", "les", "puedo",
+    "necesito", "tengo", "debo", "hacer", "este", "esta", "estos", "estas", "ese", "esa"
+}
+
+# Words are matched by prefix so "importar" finds "importacion"; longer words are cut to this stem
+STEM_LENGTH = 5
+
+_YEAR = re.compile(r"(?:19|20)\d\d")
+
+_EXCHANGE_RATE_KEYS = [normalize_question(term) for term in EXCHANGE_RATE_TERMS]
+
+
+def query_stems(question: str) -> List[str]:
+    """Distinct search stems of a question, in order"""
+    stems = []
+    for word in normalize_question(question).split():
+        # Years only say "recent"; freshness is handled by the age limit
+        if len(word) < 3 or word in STOPWORDS or _YEAR.fullmatch(word):
+            continue
+        stems.append(word[:STEM_LENGTH])
+    return list(dict.fromkeys(stems))
+
+
+class RegulationIndex:
+    """SQLite FTS5 index (bm25 ranking, accent-insensitive) of Tavily result pages.
+
+    Pages are upserted by URL as searches come back, so the index grows
+    incrementally and is shared by every agent that mounts the same file.
+    Reads go through SQLite's memory-mapped I/O. `lookup()` only answers when
+    enough fresh pages cover the question; otherwise the caller searches online.
+    """
+
+    def __init__(self, path: str, min_hits: Optional[int] = None, min_coverage: Optional[float] = None):
+        self.path = path
+        self.min_hits = min_hits or int(os.getenv("LOCAL_INDEX_MIN_HITS", "2"))
+        self.min_coverage = min_coverage or float(os.getenv("LOCAL_INDEX_MIN_COVERAGE", "0.6"))
+        self.max_age_hours = float(os.getenv("LOCAL_INDEX_MAX_AGE_HOURS", "168"))
+        self.lookups = 0
+        self.local_hits = 0
+        self.ingested = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(f"PRAGMA mmap_size={int(os.getenv('LOCAL_INDEX_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+        self.db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+            "title, content, normas, agents, url UNINDEXED, fetched_at UNINDEXED, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        # FTS tables can't index url, so upserts look pages up here
+        self.db.execute("CREATE TABLE IF NOT EXISTS page_urls (url TEXT PRIMARY KEY, page_id INTEGER NOT NULL)")
+
+    def ingest(self, raw_results: Dict[str, Any], agent_type: str) -> int:
+        """Upsert every page of a raw Tavily response; returns how many were stored"""
+        now = time.time()
+        stored = 0
+        for result in raw_results.get("results", []):
+            url = result.get("url")
+            if not url:
+                continue
+            title = result.get("title", "")
+            content = result.get("content", "")
+            facts = extract_facts(f"{title} {content}", url)
+            agents = set(agent_type.split("+"))
+
+            self.db.execute("BEGIN")
+            try:
+                existing = self.db.execute(
+                    "SELECT p.rowid, p.agents FROM page_urls u JOIN pages p ON p.rowid = u.page_id WHERE u.url = ?", (url,)
+                ).fetchone()
+                if existing:
+                    agents.update(existing[1].split())
+                    self.db.execute("DELETE FROM pages WHERE rowid = ?", (existing[0],))
+                cursor = self.db.execute(
+                    "INSERT INTO pages (title, content, normas, agents, url, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (title, content, " ".join(n["text"] for n in facts["normas"]), " ".join(sorted(agents)), url, now)
+                )
+                self.db.execute("INSERT OR REPLACE INTO page_urls (url, page_id) VALUES (?, ?)", (url, cursor.lastrowid))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            stored += 1
+        self.ingested += stored
+        return stored
+
+    def max_age_seconds(self, question: str) -> float:
+        key = normalize_question(question)
+        if any(term in key for term in _EXCHANGE_RATE_KEYS):
+            return CACHE_DURATIONS["exchange_rate"] * 3600
+        return self.max_age_hours * 3600
+
+    def lookup(self, question: str, agent_type: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        """Best fresh pages for the question as a raw Tavily-shaped response, or None if recall is insufficient"""
+        self.lookups += 1
+        stems = query_stems(question)
+        if not stems:
+            return None
+
+        agents = " OR ".join(f'"{agent}"' for agent in agent_type.split("+"))
+        terms = " OR ".join(f'"{stem}"*' for stem in stems)
+        rows = self.db.execute(
+            "SELECT title, content, url, fetched_at, bm25(pages, 2.0, 1.0, 3.0, 0.0) AS rank FROM pages "
+            "WHERE pages MATCH ? AND fetched_at >= ? ORDER BY rank LIMIT ?",
+            (f"agents:({agents}) AND {{title content normas}}:({terms})",
+             time.time() - self.max_age_seconds(question), limit)
+        ).fetchall()
+
+        # Keep pages that mention most of the question's stems
+        covered = [row for row in rows if self._coverage(stems, f"{row[0]} {row[1]}") >= self.min_coverage]
+        if len(covered) < self.min_hits:
+            return None
+
+        self.local_hits += 1
+        return {
+            "answer": "",
+            "results": [
+                {"title": title, "url": url, "content": content, "score": round(-rank, 4)}
+                for title, content, url, _, rank in covered
+            ],
+            "fetched_at": datetime.fromtimestamp(min(row[3] for row in covered)).isoformat()
+        }
+
+    @staticmethod
+    def _coverage(stems: List[str], text: str) -> float:
+        words = normalize_question(text)
+        found = sum(1 for stem in stems if re.search(rf"\b{re.escape(stem)}", words))
+        return found / len(stems)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "documents": self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0],
+            "ingested": self.ingested,
+            "lookups": self.lookups,
+            "local_hits": self.local_hits,
+            "hit_rate": round(self.local_hits / self.lookups, 3) if self.lookups else 0.0
+        }
+
+
+def create_regulation_index() -> Optional[RegulationIndex]:
+    """The shared index when LOCAL_INDEX_ENABLED=true, else None"""
+    if os.getenv("LOCAL_INDEX_ENABLED", "false").lower() != "true":
+        return None
+    path = os.getenv("LOCAL_INDEX_PATH", "/cache/regulation_index.db")
+    try:
+        return RegulationIndex(path)
+    except Exception as e:
+        logger.error(f"Could not open regulation index at {path}: {str(e)}")
+        return None
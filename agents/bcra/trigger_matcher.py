@@ -0,0 +1,49 @@
+"""Compiled multi-category trigger matching for the search decision"""
+import re
+from typing import Dict, List, Set
+from normalize import normalize_question
+from search_config import AGENT_SEARCH_CONFIG, TEMPORAL_TRIGGERS, PRIORITY_CATEGORIES
+
+
+class TriggerMatcher:
+    """Finds which trigger categories fire for a question in one regex pass.
+
+    Every term from every category is accent-folded and compiled into a single
+    alternation matched at word starts ("limite" and "límite" both fire, "import"
+    fires on "importar"). Cost stays one scan however long the lists get.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        # normalized term -> categories it belongs to
+        self.terms: Dict[str, Set[str]] = {}
+        for category, terms in categories.items():
+            for term in terms:
+                key = normalize_question(term)
+                if key:
+                    self.terms.setdefault(key, set()).add(category)
+
+        # The regex takes the longest term at each position, so a longer term also
+        # fires the categories of any shorter term it starts with ("importación" -> "import")
+        for term, term_categories in self.terms.items():
+            for other, other_categories in self.terms.items():
+                if other != term and term.startswith(other):
+                    term_categories |= other_categories
+
+        alternation = "|".join(re.escape(t) for t in sorted(self.terms, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b(?:{alternation})")
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Return {category: [matched terms]} for every category that fired"""
+        fired: Dict[str, List[str]] = {}
+        for term in dict.fromkeys(m.group(0) for m in self.pattern.finditer(normalize_question(text))):
+            for category in self.terms[term]:
+                fired.setdefault(category, []).append(term)
+        return fired
+
+
+def build_search_triggers() -> TriggerMatcher:
+    """Matcher over the search_config categories: priority, temporal and one per agent"""
+    categories = {"priority": PRIORITY_CATEGORIES, "temporal": TEMPORAL_TRIGGERS}
+    for agent, config in AGENT_SEARCH_CONFIG.items():
+        categories[agent] = config.get("triggers", [])
+    return TriggerMatcher(categories)
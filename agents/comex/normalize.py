@@ -0,0 +1,17 @@
+"""Question normalization shared by the caches"""
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def fold_accents(text: str) -> str:
+    """Strip diacritics: 'cotización' -> 'cotizacion'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form used as cache key: casefold, accent folding, punctuation/whitespace collapse"""
+    text = fold_accents(question.casefold())
+    return _NON_WORD.sub(" ", text).strip()
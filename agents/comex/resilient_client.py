@@ -0,0 +1,286 @@
+"""Retries, hedged requests and a circuit breaker around a pooled OpenRouter client"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+import httpx
+from http_pool import PooledClient, _env_int, _env_float
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth another attempt: rate limiting and provider-side failures
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive provider failures and fails fast for `reset_after` seconds.
+
+    After that one trial request is let through (half-open); its outcome
+    closes the breaker again or re-opens it. A trial that was cancelled, or
+    that has run longer than `trial_timeout`, no longer blocks the next one.
+    """
+
+    def __init__(self, threshold: int, reset_after: float, trial_timeout: float = 60.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.trial_timeout = trial_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.trial_started = 0.0
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError unless a request may go out now; True when it goes out as the trial"""
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and self.trial_in_flight and time.monotonic() - self.trial_started > self.trial_timeout:
+            logger.warning("Circuit breaker trial timed out")
+            self.trial_in_flight = False
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            self.trial_started = time.monotonic()
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit open after {self.failures} consecutive failures")
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def failure(self):
+        self.failures += 1
+        # A failed trial re-opens the breaker for another reset period
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+            self.opens += 1
+            self.opened_at = time.monotonic()
+            logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+        self.trial_in_flight = False
+
+    def release(self, error: BaseException):
+        """Settle a trial that ended without a response: a cancelled one says nothing about
+        the provider and just frees the slot, any other error re-opens the breaker"""
+        if not self.trial_in_flight:
+            return
+        if isinstance(error, asyncio.CancelledError):
+            self.trial_in_flight = False
+        else:
+            self.failure()
+
+    def observe(self, status_code: int):
+        """Record a response: 5xx/408 count as failures; anything else, 429 included, shows the provider is up"""
+        if status_code in RETRYABLE_STATUSES and status_code != 429:
+            self.failure()
+        else:
+            self.success()
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Delay asked for by a Retry-After header (seconds or HTTP date), if any"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientClient:
+    """Sends completion requests through a PooledClient with retries, hedging and a circuit breaker.
+
+    Completions have no side effects, so failed attempts (connection errors,
+    429 and 5xx) are retried with full-jitter exponential backoff, waiting at
+    least as long as Retry-After asks (up to <PREFIX>_RETRY_AFTER_MAX). With hedging on, a duplicate request is
+    sent when the first has been out longer than the p95 of recent latencies;
+    the first usable response wins. Settings come from <PREFIX>_MAX_RETRIES,
+    <PREFIX>_BACKOFF_BASE, <PREFIX>_BACKOFF_MAX, <PREFIX>_HEDGE ("true"/"false"),
+    <PREFIX>_HEDGE_MIN_DELAY, <PREFIX>_BREAKER_THRESHOLD, <PREFIX>_BREAKER_RESET and
+    <PREFIX>_BREAKER_TRIAL_TIMEOUT.
+    """
+
+    def __init__(self, pool: PooledClient, env_prefix: str):
+        self.pool = pool
+        self.max_retries = _env_int(f"{env_prefix}_MAX_RETRIES", 2)
+        self.backoff_base = _env_float(f"{env_prefix}_BACKOFF_BASE", 0.5)
+        self.backoff_max = _env_float(f"{env_prefix}_BACKOFF_MAX", 8.0)
+        # Longer Retry-After waits than this are not worth holding a user request for
+        self.retry_after_max = _env_float(f"{env_prefix}_RETRY_AFTER_MAX", 10.0)
+        self.hedge = os.getenv(f"{env_prefix}_HEDGE", "false").lower() == "true"
+        self.hedge_min_delay = _env_float(f"{env_prefix}_HEDGE_MIN_DELAY", 2.0)
+        self.breaker = CircuitBreaker(
+            _env_int(f"{env_prefix}_BREAKER_THRESHOLD", 5),
+            _env_float(f"{env_prefix}_BREAKER_RESET", 30.0),
+            _env_float(f"{env_prefix}_BREAKER_TRIAL_TIMEOUT", 2 * pool.timeout)
+        )
+        self.latencies: deque = deque(maxlen=200)
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = retry_after_seconds(response) if response is not None else None
+        return max(delay, retry_after or 0.0)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging: p95 of recent latencies, once there are enough samples"""
+        if not self.hedge or len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return max(self.hedge_min_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """POST with retries. Returns the last response, which may still be an error status;
+        raises the last transport error, or CircuitOpenError without sending anything."""
+        trial = self.breaker.check()
+        self.requests += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                response: Optional[httpx.Response] = None
+                try:
+                    response = await self._send(url, kwargs)
+                except httpx.TransportError as e:
+                    self.breaker.failure()
+                    trial = False
+                    if attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    logger.warning(f"{self.pool.name}: {type(e).__name__}, retrying ({attempt + 1}/{self.max_retries})")
+                else:
+                    self.breaker.observe(response.status_code)
+                    trial = False
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        return response
+                    if attempt == self.max_retries or (retry_after_seconds(response) or 0.0) > self.retry_after_max:
+                        self.failures += 1
+                        return response
+                    logger.warning(f"{self.pool.name}: HTTP {response.status_code}, retrying ({attempt + 1}/{self.max_retries})")
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt, response))
+                trial = self.breaker.check()
+        except BaseException as e:
+            # A trial that ended without a response (cancelled, unexpected error) must not keep the half-open slot
+            if trial:
+                self.breaker.release(e)
+            raise
+
+    async def _send(self, url: str, kwargs: Dict[str, Any]) -> httpx.Response:
+        """One attempt, hedged with a duplicate request when the first one runs past the p95 latency"""
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        if delay is None:
+            response = await self.pool.client.post(url, **kwargs)
+            self.latencies.append(time.perf_counter() - start)
+            return response
+
+        first = asyncio.ensure_future(self.pool.client.post(url, **kwargs))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                self.latencies.append(time.perf_counter() - start)
+                return first.result()
+
+            self.hedges += 1
+            second = asyncio.ensure_future(self.pool.client.post(url, **kwargs))
+            pending.add(second)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                usable = [task for task in done
+                          if not task.exception() and task.result().status_code not in RETRYABLE_STATUSES]
+                # Take the first usable answer; if neither call gives one, whatever the last returned
+                if usable or not pending:
+                    winner = usable[0] if usable else done.pop()
+                    if winner is second:
+                        self.hedge_wins += 1
+                    self.latencies.append(time.perf_counter() - start)
+                    return winner.result()
+        finally:
+            # Also runs when the caller is cancelled mid-wait
+            for task in pending:
+                task.cancel()
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Streaming request; retried like post() only until the response starts, never mid-stream"""
+        trial = self.breaker.check()
+        self.requests += 1
+        client = self.pool.client
+        try:
+            for attempt in range(self.max_retries + 1):
+                response: Optional[httpx.Response] = None
+                try:
+                    response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+                except httpx.TransportError as e:
+                    self.breaker.failure()
+                    trial = False
+                    if attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    logger.warning(f"{self.pool.name}: {type(e).__name__}, retrying stream ({attempt + 1}/{self.max_retries})")
+                else:
+                    self.breaker.observe(response.status_code)
+                    trial = False
+                    retryable = response.status_code in RETRYABLE_STATUSES
+                    if not retryable or attempt == self.max_retries or (retry_after_seconds(response) or 0.0) > self.retry_after_max:
+                        if retryable:
+                            self.failures += 1
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    await response.aclose()
+                    logger.warning(f"{self.pool.name}: HTTP {response.status_code}, retrying stream ({attempt + 1}/{self.max_retries})")
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt, response))
+                trial = self.breaker.check()
+        except BaseException as e:
+            if trial:
+                self.breaker.release(e)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry, hedge and breaker counters for the /metrics endpoint"""
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "p95_latency": round(ordered[int(len(ordered) * 0.95) - 1], 3) if len(ordered) >= 20 else None,
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "opens": self.breaker.opens,
+                "rejected": self.breaker.rejected
+            }
+        }
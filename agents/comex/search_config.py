@@ -48,11 +48,21 @@ AGENT_SEARCH_CONFIG = {
     }
 }
 
+# High-value topics that always get a full search, whatever the agent.
+# Terms match at the start of a word, so stems like "import" cover "importar".
+PRIORITY_CATEGORIES = [
+    "import", "export", "arancel", "límite", "requisito",
+    "tarifa", "impuesto", "licencia", "certificado"
+]
+
 TEMPORAL_TRIGGERS = [
     "actual", "hoy", "vigente", "último", "última",
     "2024", "2025", "ahora", "reciente", "nuevo"
 ]
 
+# Topics that change intraday and use the short cache duration
+EXCHANGE_RATE_TERMS = ["cotización", "dólar", "tipo de cambio"]
+
 # Cache durations in hours
 CACHE_DURATIONS = {
     "exchange_rate": 1,  # 1 hour for exchange rates
@@ -2,54 +2,207 @@
 Tavily Search Service for Real-time Information Retrieval
 """
 import os
-import httpx
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime
 import json
 import hashlib
 import asyncio
-from search_config import AGENT_SEARCH_CONFIG, TEMPORAL_TRIGGERS, CACHE_DURATIONS
+import logging
+import sqlite3
+import threading
+import time
+from search_config import AGENT_SEARCH_CONFIG, CACHE_DURATIONS, EXCHANGE_RATE_TERMS
+from http_pool import PooledClient
+from ttl_cache import TTLCache
+from context_budget import ContextAssembler, BUDGETS
+from fact_extractor import extract_facts, highlight_percentages
+from trigger_matcher import build_search_triggers
+from regulation_index import create_regulation_index
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background sweeps of expired search cache entries
+SEARCH_CACHE_SWEEP_INTERVAL = float(os.getenv("SEARCH_CACHE_SWEEP_INTERVAL", "300"))
+# Seconds to wait for an advanced search before also starting a basic one as a fallback (0 = never)
+SEARCH_FALLBACK_DEADLINE = float(os.getenv("SEARCH_FALLBACK_DEADLINE", "0"))
 
 
 class SearchCache:
-    """Simple in-memory cache for search results"""
-    def __init__(self):
-        self.cache = {}
+    """Bounded in-memory LRU cache for search results.
+
+    The TTL is decided once at write time (short for exchange-rate queries)
+    and stored as a monotonic expiry with the entry. Size is capped by entry
+    count and by the serialized size of the cached results.
+    """
+    # Whether get/set/sweep block on I/O and should run off the event loop
+    blocking = False
+    
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.cache = TTLCache(
+            max_entries=max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000")),
+            max_bytes=max_bytes or int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        )
+    
+    def get_key(self, query: str, agent_type: str, search_depth: str = "advanced") -> str:
+        return hashlib.md5(f"{query}:{agent_type}:{search_depth}".encode()).hexdigest()
+    
+    def get(self, query: str, agent_type: str, search_depth: str = "advanced") -> Optional[Dict]:
+        return self.cache.get(self.get_key(query, agent_type, search_depth))
+    
+    def set(self, query: str, agent_type: str, results: Dict, search_depth: str = "advanced"):
+        size = len(json.dumps(results, ensure_ascii=False).encode())
+        self.cache.set(self.get_key(query, agent_type, search_depth), results, self.ttl_seconds(query), size)
+    
+    def ttl_seconds(self, query: str) -> float:
+        # Determine cache duration based on query type
+        query_lower = query.lower()
+        if any(term in query_lower for term in EXCHANGE_RATE_TERMS):
+            return CACHE_DURATIONS["exchange_rate"] * 3600
+        return CACHE_DURATIONS["regulation"] * 3600
     
-    def get_key(self, query: str, agent_type: str) -> str:
-        return hashlib.md5(f"{query}:{agent_type}".encode()).hexdigest()
+    def sweep(self) -> int:
+        return self.cache.sweep()
     
-    def get(self, query: str, agent_type: str) -> Optional[Dict]:
-        key = self.get_key(query, agent_type)
-        if key not in self.cache:
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self.cache.stats()}
+
+
+class SQLiteSearchCache(SearchCache):
+    """Disk-backed search cache shared by every agent/worker that mounts the same file.
+
+    Uses SQLite in WAL mode so concurrent readers never block and entries
+    survive container restarts. Same get/set interface as SearchCache;
+    expiry uses wall-clock time since it is shared across processes. A locked
+    or failing database counts as a miss on get and is skipped on set, so
+    search keeps working without the cache.
+    """
+    blocking = True
+    
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+        # Calls arrive from worker threads; keep each one's statements together
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache(last_access)")
+    
+    def get(self, query: str, agent_type: str, search_depth: str = "advanced") -> Optional[Dict]:
+        try:
+            with self._lock:
+                return self._get(query, agent_type, search_depth)
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"Shared search cache read failed, treating as a miss: {str(e)}")
+            return None
+    
+    def _get(self, query: str, agent_type: str, search_depth: str) -> Optional[Dict]:
+        key = self.get_key(query, agent_type, search_depth)
+        now = time.time()
+        row = self.db.execute("SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if now >= row[1]:
+            self.db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            self.expirations += 1
+            self.misses += 1
             return None
-            
-        cached = self.cache[key]
-        if self._is_valid(cached):
-            return cached["results"]
         
-        del self.cache[key]
-        return None
+        self.db.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
     
-    def set(self, query: str, agent_type: str, results: Dict):
-        key = self.get_key(query, agent_type)
-        self.cache[key] = {
-            "query": query,
-            "results": results,
-            "timestamp": datetime.now().isoformat()
+    def set(self, query: str, agent_type: str, results: Dict, search_depth: str = "advanced"):
+        value = json.dumps(results, ensure_ascii=False)
+        now = time.time()
+        try:
+            with self._lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (self.get_key(query, agent_type, search_depth), value, len(value.encode()), now + self.ttl_seconds(query), now)
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared search cache write failed, not caching: {str(e)}")
+    
+    def _evict(self):
+        """Drop least recently used rows until both the entry and byte limits hold"""
+        count, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache").fetchone()
+        while count > 1 and (count > self.max_entries or total > self.max_bytes):
+            row = self.db.execute(
+                "SELECT key, size FROM search_cache ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self.db.execute("DELETE FROM search_cache WHERE key = ?", (row[0],))
+            count -= 1
+            total -= row[1]
+            self.evictions += 1
+    
+    def sweep(self) -> int:
+        with self._lock:
+            removed = self.db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        self.expirations += removed
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": count,
+            "max_entries": self.max_entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors
         }
+
+
+def create_search_cache() -> SearchCache:
+    """Pick the cache backend from SEARCH_CACHE_BACKEND ("memory" or "sqlite")"""
+    if os.getenv("SEARCH_CACHE_BACKEND", "memory").lower() == "sqlite":
+        path = os.getenv("SEARCH_CACHE_PATH", "/cache/search_cache.db")
+        try:
+            return SQLiteSearchCache(path)
+        except Exception as e:
+            logger.error(f"Could not open shared search cache at {path}, using memory: {str(e)}")
+    return SearchCache()
+
+
+def agent_search_config(agent_type: str) -> Dict[str, Any]:
+    """Search config for one agent, or the merged domains/keywords of a combined
+    "comex+senasa" search (no site: suffix; include_domains already restricts it)"""
+    agents = agent_type.split("+")
+    if len(agents) == 1:
+        return AGENT_SEARCH_CONFIG.get(agent_type, {})
     
-    def _is_valid(self, cached_data: Dict) -> bool:
-        cached_time = datetime.fromisoformat(cached_data.get("timestamp", ""))
-        query = cached_data.get("query", "").lower()
-        
-        # Determine cache duration based on query type
-        if any(term in query for term in ["cotización", "dólar", "tipo de cambio"]):
-            duration = timedelta(hours=CACHE_DURATIONS["exchange_rate"])
-        else:
-            duration = timedelta(hours=CACHE_DURATIONS["regulation"])
-        
-        return datetime.now() - cached_time < duration
+    configs = [AGENT_SEARCH_CONFIG.get(agent, {}) for agent in agents]
+    return {
+        "domains": list(dict.fromkeys(d for c in configs for d in c.get("domains", []))),
+        "keywords": list(dict.fromkeys(k for c in configs for k in c.get("keywords", [])))
+    }
 
 
 class TavilySearchService:
@@ -59,56 +212,186 @@ class TavilySearchService:
         self.api_key = os.getenv("TAVILY_API_KEY")
         self.enabled = os.getenv("ENABLE_SEARCH", "false").lower() == "true"
         self.base_url = "https://api.tavily.com"
-        self.cache = SearchCache()
+        self.cache = create_search_cache()
+        self.triggers = build_search_triggers()
+        # Local full-text index of past results, consulted before Tavily (None when disabled)
+        self.index = create_regulation_index()
+        # Shared keep-alive pool so quick + full searches reuse warm connections
+        self.http = PooledClient("tavily", env_prefix="TAVILY", timeout=30.0)
+        self._sweeper = None
+        # cache key -> task of the search currently running for it (single flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.searches = 0
+        self.coalesced = 0
         
         if self.enabled and not self.api_key:
             raise ValueError("Search enabled but TAVILY_API_KEY not found")
     
+    async def start(self):
+        """Open the pooled Tavily client and start cache sweeps (called from the service lifespan)"""
+        await self.http.start()
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+    
+    async def close(self):
+        """Stop cache sweeps and close the pooled Tavily client"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        await self.http.close()
+    
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(SEARCH_CACHE_SWEEP_INTERVAL)
+            # One failed sweep (e.g. a locked shared cache) must not end the loop
+            try:
+                removed = await self._cache_call(self.cache.sweep)
+            except Exception as e:
+                logger.error(f"Search cache sweep failed: {str(e)}")
+                continue
+            if removed:
+                logger.info(f"Search cache sweep removed {removed} expired entries")
+    
+    async def _cache_call(self, method, *args):
+        """Call a cache method, in a worker thread when the backend blocks (SQLite)"""
+        if self.cache.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
+    
+    def explain_search(self, question: str, agent_type: str) -> Dict[str, Any]:
+        """Search depth plus the trigger categories (priority, temporal, agent) that decided it"""
+        if not self.enabled:
+            return {"depth": "none", "fired": {}}
+        
+        fired = self.triggers.match(question)
+        # Only this agent's own triggers count
+        fired = {category: terms for category, terms in fired.items()
+                 if category in ("priority", "temporal") or category in agent_type.split("+")}
+        
+        # Any fired category means a full search with 5 results, otherwise a quick one with 1
+        return {"depth": "full" if fired else "quick", "fired": fired}
+    
     def needs_search(self, question: str, agent_type: str) -> str:
         """Determine search depth needed: 'none', 'quick', or 'full'"""
-        if not self.enabled:
-            return "none"
+        decision = self.explain_search(question, agent_type)
+        if decision["fired"]:
+            logger.info(f"Full search triggered by {decision['fired']}")
+        return decision["depth"]
+    
+    async def planned_search(self, question: str, agent_type: str,
+                             issued: Optional[List[str]] = None) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Run the single search needs_search() asks for.
+
+        Returns (results, depths) where depths lists every Tavily call this
+        request started ("basic"/"advanced") so callers can report count and cost;
+        searches served from the cache or joined in flight are not listed. A "full"
+        plan only issues a basic search if the advanced one misses
+        SEARCH_FALLBACK_DEADLINE; the basic result is used only if it arrives first.
+        Depths are appended to `issued` (also the returned list) as each call starts.
+        """
+        depths = issued if issued is not None else []
+        plan = self.needs_search(question, agent_type)
+        if plan == "none":
+            return None, depths
         
-        question_lower = question.lower()
+        local = self.local_search(question, agent_type)
+        if local is not None:
+            return local, depths
         
-        # High priority categories that always need search
-        ALWAYS_SEARCH_CATEGORIES = [
-            "import", "export", "arancel", "límite", "requisito",
-            "tarifa", "impuesto", "licencia", "certificado"
-        ]
+        if plan == "quick":
+            return await self.quick_search(question, agent_type, depths), depths
         
-        # Check for high-value/complex topics
-        has_priority_category = any(cat in question_lower for cat in ALWAYS_SEARCH_CATEGORIES)
+        full = asyncio.ensure_future(self.search(question, agent_type, issued=depths))
+        if SEARCH_FALLBACK_DEADLINE <= 0:
+            return await full, depths
         
-        # Check temporal triggers
-        has_temporal = any(t in question_lower for t in TEMPORAL_TRIGGERS)
+        done, _ = await asyncio.wait({full}, timeout=SEARCH_FALLBACK_DEADLINE)
+        if done:
+            return full.result(), depths
         
-        # Check agent-specific triggers
-        agent_triggers = AGENT_SEARCH_CONFIG.get(agent_type, {}).get("triggers", [])
-        has_agent_trigger = any(t in question_lower for t in agent_triggers)
+        logger.info(f"Advanced search slower than {SEARCH_FALLBACK_DEADLINE}s, starting basic fallback")
+        quick = asyncio.ensure_future(self.quick_search(question, agent_type, depths))
+        done, _ = await asyncio.wait({full, quick}, return_when=asyncio.FIRST_COMPLETED)
+        if full in done and not full.result().get("error"):
+            return full.result(), depths
         
-        # Determine search depth
-        if has_priority_category or has_temporal or has_agent_trigger:
-            return "full"  # Full search with 5 results
-        else:
-            return "quick"  # Quick search with 1 result
+        quick_results = await quick
+        if quick_results.get("error"):
+            return await full, depths
+        # The advanced search keeps running and still fills the cache for the next caller
+        return quick_results, depths
     
-    async def quick_search(self, query: str, agent_type: str) -> Dict[str, Any]:
+    def local_search(self, question: str, agent_type: str) -> Optional[Dict[str, Any]]:
+        """Results from the local regulation index when it covers the question with fresh pages"""
+        if self.index is None:
+            return None
+        try:
+            raw = self.index.lookup(question, agent_type)
+        except Exception as e:
+            logger.error(f"Regulation index lookup failed: {str(e)}")
+            return None
+        if raw is None:
+            return None
+        
+        logger.info(f"Answered search from local index with {len(raw['results'])} pages")
+        processed = self._process_results(raw, agent_type)
+        processed["last_updated"] = raw["fetched_at"]
+        processed["local_index"] = True
+        return processed
+    
+    async def shared_search(self, question: str, agent_types: List[str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """One combined search over the domains of every agent in a multi-agent query.
+
+        Full depth if any of the agents would have searched fully. The results are
+        meant to be handed to each agent as QueryRequest.context["search_results"].
+        """
+        return await self.planned_search(question, "+".join(sorted(set(agent_types))))
+    
+    async def quick_search(self, query: str, agent_type: str, issued: Optional[List[str]] = None) -> Dict[str, Any]:
         """Perform a quick search with minimal results"""
-        return await self.search(query, agent_type, max_results=1, search_depth="basic")
+        return await self.search(query, agent_type, max_results=1, search_depth="basic", issued=issued)
     
-    async def search(self, query: str, agent_type: str, max_results: int = 5, search_depth: str = "advanced") -> Dict[str, Any]:
-        """Perform search with caching and agent optimization"""
+    async def search(self, query: str, agent_type: str, max_results: int = 5, search_depth: str = "advanced",
+                     issued: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Perform search with caching and agent optimization.
+
+        `search_depth` is appended to `issued` only when this call starts a
+        Tavily request, not when it is served from the cache or joins one in flight.
+        """
         if not self.enabled:
             return {"error": True, "message": "Search disabled", "results": []}
         
         # Check cache
-        cached = self.cache.get(query, agent_type)
+        cached = await self._cache_call(self.cache.get, query, agent_type, search_depth)
         if cached:
             return cached
         
+        # Join an identical search that is already in flight instead of paying for another
+        key = self.cache.get_key(query, agent_type, search_depth)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.searches += 1
+            if issued is not None:
+                issued.append(search_depth)
+            task = asyncio.ensure_future(self._search_and_cache(query, agent_type, max_results, search_depth))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield so one caller being cancelled doesn't cancel the search for the others
+        return await asyncio.shield(task)
+    
+    async def _search_and_cache(self, query: str, agent_type: str, max_results: int, search_depth: str) -> Dict[str, Any]:
         # Build enhanced query
-        config = AGENT_SEARCH_CONFIG.get(agent_type, {})
+        config = agent_search_config(agent_type)
         enhanced_query = self._build_query(query, config)
         
         # Execute search
@@ -116,8 +399,15 @@ class TavilySearchService:
             results = await self._execute_search(enhanced_query, config, max_results, search_depth)
             processed = self._process_results(results, agent_type)
             
+            # Keep every page in the local index so later questions can skip Tavily
+            if self.index is not None:
+                try:
+                    self.index.ingest(results, agent_type)
+                except Exception as e:
+                    logger.error(f"Regulation index ingest failed: {str(e)}")
+            
             # Cache results
-            self.cache.set(query, agent_type, processed)
+            await self._cache_call(self.cache.set, query, agent_type, processed, search_depth)
             return processed
             
         except Exception as e:
@@ -152,16 +442,12 @@ class TavilySearchService:
             "exclude_domains": []
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(f"{self.base_url}/search", json=params)
-            response.raise_for_status()
-            return response.json()
+        response = await self.http.client.post(f"{self.base_url}/search", json=params)
+        response.raise_for_status()
+        return response.json()
     
     def _process_results(self, raw_results: Dict, agent_type: str) -> Dict[str, Any]:
         """Process and extract key information"""
-        import re
-        from urllib.parse import urlparse
-        
         results = raw_results.get("results", [])[:5]
         answer = raw_results.get("answer", "")
         
@@ -173,103 +459,98 @@ class TavilySearchService:
             "sources_consulted": []  # Track actual sources for display
         }
         
+        agents = agent_type.split("+")  # combined searches get every agent's facts
         for result in results:
+            # One scan of title + content; the hits are kept so format_for_prompt doesn't rescan
+            facts = extract_facts(f"{result.get('title', '')} {result.get('content', '')}", result.get("url", ""))
             source = {
                 "title": result.get("title", ""),
                 "url": result.get("url", ""),
                 "content": result.get("content", "")[:500],
-                "score": result.get("score", 0)
+                "score": result.get("score", 0),
+                "facts": facts
             }
             processed["sources"].append(source)
             
-            # Extract domain and key info for display
-            if result.get("url"):
-                domain = urlparse(result["url"]).netloc
-                # Extract regulation numbers from title or content
-                text = f"{result.get('title', '')} {result.get('content', '')}"
-                regulations = re.findall(r'(?:Resolución|Comunicación|Decreto|NCM)\s*(?:N°|Nº|A)?\s*[\d\./-]+', text)
-                
-                if regulations:
-                    for reg in regulations[:2]:  # Max 2 per source
-                        processed["sources_consulted"].append(f"{domain} ({reg})")
+            # Domain and regulation numbers for display
+            if facts["domain"]:
+                if facts["normas"]:
+                    for norma in facts["normas"][:2]:  # Max 2 per source
+                        processed["sources_consulted"].append(f"{facts['domain']} ({norma['text']})")
                 else:
-                    processed["sources_consulted"].append(domain)
+                    processed["sources_consulted"].append(facts["domain"])
             
             # Extract agent-specific facts
-            content = source["content"].lower()
-            
-            if agent_type == "comex" and "arancel" in content:
-                percentages = re.findall(r'\d+(?:\.\d+)?%', source["content"])
-                if percentages:
-                    processed["key_facts"].append(f"Aranceles: {', '.join(set(percentages))}")
+            if "comex" in agents and "arancel" in source["content"].lower():
+                if facts["percentages"]:
+                    processed["key_facts"].append(f"Aranceles: {', '.join(facts['percentages'])}")
             
-            elif agent_type == "bcra":
-                amounts = re.findall(r'(?:USD?\s*)?(?:\$\s*)?\d+(?:\.\d+)?', source["content"])
+            if "bcra" in agents:
+                # Distinct amounts only: regulation numbers and percentages are not counted
+                amounts = facts["amounts"]
                 if amounts and len(amounts) <= 5:
                     processed["key_facts"].append(f"Montos: {', '.join(amounts[:3])}")
         
         return processed
     
-    def format_for_prompt(self, search_results: Dict[str, Any]) -> str:
+    def format_for_prompt(self, search_results: Dict[str, Any], budget: Optional[int] = None) -> str:
         """Format results for LLM prompt inclusion"""
+        return self.assemble_context(search_results, budget)[0]
+
+    def assemble_context(self, search_results: Dict[str, Any], budget: Optional[int] = None):
+        """Search context for the prompt within a token budget. Returns (text, assembler stats).
+
+        Extracted values and source titles go in first, then source excerpts by
+        score, the summary and the key facts, each trimmed to what is left.
+        """
         if search_results.get("error") or not search_results.get("sources"):
-            return ""
+            return "", {}
         
-        import re
+        context = ContextAssembler(budget or BUDGETS["search"])
+        context.add("📊 INFORMACIÓN ACTUALIZADA DE BÚSQUEDA WEB:\n⚠️ IMPORTANTE: Usa estos valores EXACTAMENTE como aparecen:\n", required=True)
         
-        lines = ["📊 INFORMACIÓN ACTUALIZADA DE BÚSQUEDA WEB:"]
-        lines.append("⚠️ IMPORTANTE: Usa estos valores EXACTAMENTE como aparecen:\n")
+        # Best-scored sources first
+        sources = sorted(search_results["sources"], key=lambda s: s.get("score", 0), reverse=True)[:3]
         
         # Extract and highlight numeric values from all sources
         all_percentages = set()
         all_amounts = set()
         
-        for source in search_results.get("sources", [])[:3]:
-            content = source.get("content", "")
-            # Extract percentages (e.g., 16%, 10.5%)
-            percentages = re.findall(r'(\d+(?:\.\d+)?%)', content)
-            all_percentages.update(percentages)
-            
-            # Extract USD amounts
-            usd_amounts = re.findall(r'USD?\s*(\d+(?:\.\d+)?)', content)
-            all_amounts.update(usd_amounts)
+        for source in sources:
+            # Entries cached before facts were stored get scanned here
+            facts = source.get("facts") or extract_facts(source.get("content", ""))
+            all_percentages.update(facts["percentages"])
+            all_amounts.update(facts["usd_amounts"])
         
         # Show extracted values prominently
+        values = []
         if all_percentages:
-            lines.append("✓ PORCENTAJES ENCONTRADOS: " + ", ".join(sorted(all_percentages)))
+            values.append("✓ PORCENTAJES ENCONTRADOS: " + ", ".join(sorted(all_percentages)))
         if all_amounts:
-            lines.append("✓ MONTOS USD ENCONTRADOS: " + ", ".join(sorted(all_amounts)[:5]))
-        
-        if all_percentages or all_amounts:
-            lines.append("")
+            values.append("✓ MONTOS USD ENCONTRADOS: " + ", ".join(sorted(all_amounts)[:5]))
+        if values:
+            context.add("\n".join(values) + "\n", priority=90, min_tokens=20)
         
         # Add summary if available
         if search_results.get("summary"):
-            lines.append(f"RESUMEN: {search_results['summary']}\n")
+            context.add(f"RESUMEN: {search_results['summary']}\n", priority=60, min_tokens=30)
         
         # Add key facts
         if search_results.get("key_facts"):
-            lines.append("DATOS CLAVE:")
-            lines.extend(f"• {fact}" for fact in search_results["key_facts"])
-            lines.append("")
+            facts_text = "\n".join(f"• {fact}" for fact in search_results["key_facts"])
+            context.add(f"DATOS CLAVE:\n{facts_text}\n", priority=50, min_tokens=20)
         
         # Add sources with highlighted values
-        if search_results.get("sources"):
-            lines.append("FUENTES VERIFICADAS:")
-            for i, source in enumerate(search_results["sources"][:3], 1):
-                lines.append(f"\n{i}. {source['title']}")
-                lines.append(f"   URL: {source['url']}")
-                
-                # Highlight numeric values in content preview
-                content_preview = source['content'][:200]
-                # Bold percentages in content
-                content_preview = re.sub(r'(\d+(?:\.\d+)?%)', r'**\1**', content_preview)
-                lines.append(f"   Contenido: {content_preview}...")
-        
-        lines.append(f"\nActualizado: {search_results.get('last_updated', 'N/A')}")
-        lines.append("=== FIN INFORMACIÓN DE BÚSQUEDA ===")
-        
-        return "\n".join(lines)
+        context.add("FUENTES VERIFICADAS:", priority=80)
+        for i, source in enumerate(sources, 1):
+            context.add(f"\n{i}. {source['title']}\n   URL: {source['url']}", priority=80 - i)
+            # Bold percentages in content preview
+            content_preview = highlight_percentages(source['content'][:200])
+            context.add(f"   Contenido: {content_preview}...", priority=70 - i, min_tokens=15)
+        
+        context.add(f"\nActualizado: {search_results.get('last_updated', 'N/A')}\n=== FIN INFORMACIÓN DE BÚSQUEDA ===", required=True)
+        
+        return context.render(), context.stats()
 
 
 # Singleton
@@ -0,0 +1,197 @@
+"""Token budgets for the context we put in LLM prompts"""
+import json
+import logging
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-stage budgets for the variable part of a prompt (search context, audited answers)
+BUDGETS = {
+    "search": int(os.getenv("CONTEXT_BUDGET_SEARCH", "700")),
+    "audit": int(os.getenv("CONTEXT_BUDGET_AUDIT", "1200")),
+    "audit_multi": int(os.getenv("CONTEXT_BUDGET_AUDIT_MULTI", "2400"))
+}
+
+# Chat formatting the provider adds around each message
+MESSAGE_OVERHEAD = 4
+
+# Letters, digit runs, and any other non-space character
+_PIECES = re.compile(r"[^\W\d_]+|\d+|\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count without a tokenizer.
+
+    Words cost one token per 4 letters, digit runs one per 3 digits and every
+    other symbol one (emoji two). Close enough to budget with; /metrics reports
+    how far it is from the provider's count.
+    """
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif first.isalpha():
+            tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 2 if ord(first) > 0x2000 else 1
+    return tokens
+
+
+def estimate_messages(messages: List[Dict[str, str]]) -> int:
+    """Estimated prompt tokens of a chat request"""
+    return sum(estimate_tokens(message["content"]) + MESSAGE_OVERHEAD for message in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a word boundary so it fits in max_tokens (ellipsis included)"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    # Longest word prefix that still fits
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle]) + "…") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]).rstrip(" ,;:") + "…" if low else ""
+
+
+class ContextAssembler:
+    """Fill a token budget with prompt sections.
+
+    Sections are accepted by priority (highest first, ties in insertion
+    order) and rendered in insertion order. A section that doesn't fit is
+    trimmed when it allows it (`min_tokens`) and dropped otherwise; required
+    sections are always kept.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._sections: List[Tuple[str, int, int, bool]] = []
+        self.dropped = 0
+        self.trimmed = 0
+        self.tokens = 0
+
+    def add(self, text: str, priority: int = 0, min_tokens: int = 0, required: bool = False):
+        self._sections.append((text, priority, min_tokens, required))
+
+    def render(self, separator: str = "\n") -> str:
+        order = sorted(range(len(self._sections)), key=lambda i: (not self._sections[i][3], -self._sections[i][1], i))
+        kept: Dict[int, str] = {}
+        used = 0
+        for i in order:
+            text, _, min_tokens, required = self._sections[i]
+            cost = estimate_tokens(text)
+            remaining = self.budget - used
+            if required or cost <= remaining:
+                kept[i] = text
+                used += cost
+            elif min_tokens and remaining >= min_tokens:
+                kept[i] = truncate_to_tokens(text, remaining)
+                used += estimate_tokens(kept[i])
+                self.trimmed += 1
+            else:
+                self.dropped += 1
+        self.tokens = used
+        return separator.join(kept[i] for i in sorted(kept))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"budget": self.budget, "estimated_tokens": self.tokens, "trimmed": self.trimmed, "dropped": self.dropped}
+
+
+# Answer fields the auditor needs intact; other long fields are shortened first
+_AUDIT_KEEP = {"confidence", "confidence_factors", "confidence_breakdown", "Normativa"}
+
+
+def fit_json(data: Any, budget: int) -> str:
+    """Compact JSON of an agent answer that fits the budget.
+
+    Internal keys (leading underscore) are left out; then the longest strings
+    are halved and the longest lists cut, outside the fields the audit relies
+    on, until the dump fits or nothing is left to trim.
+    """
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if not str(key).startswith("_")}
+    # Trimming works in place, so on a copy
+    data = json.loads(json.dumps(data, ensure_ascii=False))
+    dump = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    while estimate_tokens(dump) > budget:
+        if not _shrink_largest(data):
+            break
+        dump = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return dump
+
+
+def _shrink_largest(data: Any) -> bool:
+    """Halve the largest trimmable string or list in place; False when there is none"""
+    largest: Optional[Tuple[int, Any, Any]] = None
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else []
+        for key, value in items:
+            if isinstance(node, dict) and key in _AUDIT_KEEP:
+                continue
+            if isinstance(value, str) and len(value) > 80:
+                size = len(value)
+            elif isinstance(value, list) and len(value) > 2:
+                size = len(json.dumps(value, ensure_ascii=False))
+            else:
+                size = 0
+            if size and (largest is None or size > largest[0]):
+                largest = (size, node, key)
+            if isinstance(value, (dict, list)):
+                stack.append(value)
+    if largest is None:
+        return False
+    _, node, key = largest
+    value = node[key]
+    if isinstance(value, str):
+        shorter = truncate_to_tokens(value, estimate_tokens(value) // 2)
+        node[key] = shorter if len(shorter) < len(value) else value[:len(value) // 2]
+    else:
+        node[key] = value[:max(2, len(value) // 2)]
+    return True
+
+
+class ContextStats:
+    """Estimated vs. provider-reported prompt tokens for a service's /metrics"""
+
+    def __init__(self):
+        self.calls = 0
+        self.estimated_tokens = 0
+        self.prompt_tokens = 0
+        self.trimmed = 0
+        self.dropped = 0
+
+    def assembled(self, stats: Dict[str, Any]):
+        """Count the sections a ContextAssembler had to trim or drop"""
+        self.trimmed += stats.get("trimmed", 0)
+        self.dropped += stats.get("dropped", 0)
+
+    def record(self, stage: str, estimated: int, usage: Dict[str, Any]):
+        """Compare a prompt's estimate with the provider's count once the call returns"""
+        actual = usage.get("prompt_tokens", 0)
+        if not actual:
+            return
+        self.calls += 1
+        self.estimated_tokens += estimated
+        self.prompt_tokens += actual
+        logger.info(f"Prompt tokens ({stage}): estimated {estimated}, actual {actual}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budgets": BUDGETS,
+            "calls": self.calls,
+            "estimated_tokens": self.estimated_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            # >1 means the estimator undercounts
+            "actual_to_estimated": round(self.prompt_tokens / self.estimated_tokens, 3) if self.estimated_tokens else 0.0,
+            "trimmed_sections": self.trimmed,
+            "dropped_sections": self.dropped
+        }
@@ -0,0 +1,47 @@
+"""End-to-end answer cache for the gateway pipeline"""
+import os
+from typing import Dict, Any, Optional
+from normalize import normalize_question
+from search_config import CACHE_DURATIONS, EXCHANGE_RATE_TERMS
+from ttl_cache import TTLCache
+
+# Match exchange-rate topics against the normalized (accent-folded) question
+_EXCHANGE_RATE_KEYS = [normalize_question(term) for term in EXCHANGE_RATE_TERMS]
+
+
+class AnswerCache:
+    """LRU cache of final pipeline results keyed by the normalized question.
+
+    Entries expire after CACHE_DURATIONS["exchange_rate"] hours for exchange
+    rate topics and CACHE_DURATIONS["regulation"] hours otherwise.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self._cache = TTLCache(max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500")))
+
+    def ttl_seconds(self, key: str) -> float:
+        if any(term in key for term in _EXCHANGE_RATE_KEYS):
+            return CACHE_DURATIONS["exchange_rate"] * 3600
+        return CACHE_DURATIONS["regulation"] * 3600
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return self._cache.get(normalize_question(question))
+
+    def set(self, question: str, result: Dict[str, Any]):
+        """Store a pipeline result. Only successful, non-rejected answers are cached."""
+        if not self.enabled or not result.get("success"):
+            return
+        if result.get("flow", {}).get("audit", {}).get("status") == "Rechazado":
+            return
+
+        key = normalize_question(question)
+        self._cache.set(key, result, self.ttl_seconds(key))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **self._cache.stats()}
@@ -0,0 +1,185 @@
+"""Gateway service - runs the whole route/agents/audit/format flow in one request"""
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import asyncio
+import json
+import os
+import time
+import yaml
+from typing import Dict, Any, List
+import logging
+import sys
+from contextlib import asynccontextmanager
+sys.path.append('/app')
+from http_pool import PooledClient
+from pipeline import OraclePipeline
+from answer_cache import AnswerCache
+from question_log import QuestionLog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("gateway")
+
+# One keep-alive connection pool to the internal services
+services = PooledClient("services", env_prefix="GATEWAY", timeout=60.0)
+
+def load_agent_urls() -> Dict[str, str]:
+    """Load agent endpoints from agents.yml, defaulting to the compose service names"""
+    urls = {slug: f"http://{slug}:8000" for slug in ("bcra", "comex", "senasa")}
+    try:
+        with open(os.getenv("AGENTS_CONFIG", "/app/agents.yml"), "r") as f:
+            config = yaml.safe_load(f)
+            for agent in config.get("agents", []):
+                urls[agent["slug"]] = agent.get("endpoint", urls.get(agent["slug"]))
+    except Exception as e:
+        logger.error(f"Failed to load agents.yml, using defaults: {e}")
+    return urls
+
+pipeline = OraclePipeline(
+    http=services,
+    router_url=os.getenv("ROUTER_URL", "http://router:8000"),
+    auditor_url=os.getenv("AUDITOR_URL", "http://auditor:8000"),
+    agent_urls=load_agent_urls()
+)
+
+answer_cache = AnswerCache()
+# Questions asked, for scripts/warm_caches.py (QUESTION_LOG_PATH; off when unset)
+question_log = QuestionLog()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await services.start()
+    yield
+    await services.close()
+
+app = FastAPI(title="Gateway Service", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+class AskRequest(BaseModel):
+    question: str
+    # Set by scripts/warm_caches.py so warm-up traffic stays out of the question log
+    warmup: bool = False
+
+class AskResponse(BaseModel):
+    success: bool
+    response: str
+    flow: Dict[str, Any] = {}
+    agents_consulted: List[str] = []
+    total_cost: float = 0.0
+    duration: float = 0.0
+    timings: Dict[str, float] = {}
+    cached: bool = False
+
+@app.get("/health")
+async def health():
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "service": "gateway",
+        "agents_configured": len(pipeline.agent_urls)
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Connection pool statistics"""
+    return {
+        "service": "gateway",
+        "http_pool": {"services": services.stats()},
+        "answer_cache": answer_cache.stats(),
+        "question_log": question_log.stats()
+    }
+
+@app.delete("/cache")
+async def clear_cache():
+    """Drop all cached answers"""
+    answer_cache.clear()
+    return {"cleared": True}
+
+async def answer_question(question: str, on_event=None, log_question: bool = True) -> Dict[str, Any]:
+    """Serve from the answer cache, or run the pipeline and cache its result"""
+    start = time.perf_counter()
+    cached = answer_cache.get(question)
+    if log_question:
+        question_log.record(question, cached=cached is not None)
+    if cached is not None:
+        result = dict(cached, cached=True, total_cost=0.0, duration=time.perf_counter() - start, timings={})
+        if on_event:
+            await on_event("cache_hit", {"elapsed": round(result["duration"], 3), "cost_so_far": 0.0})
+        return result
+
+    result = await pipeline.process_query(question, on_event=on_event)
+    answer_cache.set(question, result)
+    return result
+
+@app.post("/ask", response_model=AskResponse)
+async def ask(request: AskRequest):
+    """Route, answer, audit and format a question in a single round trip"""
+    logger.info(f"Ask: {request.question[:80]}")
+    try:
+        result = await answer_question(request.question, log_question=not request.warmup)
+    except Exception as e:
+        logger.error(f"Pipeline error: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Pipeline error: {str(e)}")
+
+    logger.info(
+        f"Ask completed in {result['duration']:.2f}s "
+        f"(agents={result['agents_consulted']}, cost=${result['total_cost']:.6f}, cached={result.get('cached', False)})"
+    )
+    return AskResponse(**result)
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/ask/stream")
+async def ask_stream(question: str):
+    """Run the pipeline and stream a progress event as each stage finishes.
+
+    Events: `routing`, `search_started` / `search_finished`, `escalated` (model
+    cascade) and `agent_answered` per agent, `audit`, `formatted`, then `result`
+    with the AskResponse payload (or `error`). Cached answers emit `cache_hit` followed by `result`. A GET endpoint so browsers can consume it with EventSource.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_event(event: str, data: Dict[str, Any]):
+        await queue.put((event, data))
+
+    async def run():
+        try:
+            result = await answer_question(question, on_event=on_event)
+            await queue.put(("result", AskResponse(**result).model_dump()))
+        except Exception as e:
+            logger.error(f"Pipeline error: {type(e).__name__}: {str(e)}")
+            await queue.put(("error", {"detail": f"Pipeline error: {str(e)}"}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,318 @@
+"""Server-side query pipeline: route -> agent fan-out -> audit -> format"""
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Async callback receiving (event_name, payload) for each completed stage
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class OraclePipeline:
+    """In-cluster version of BureaucracyOracle.process_query with multi-agent support.
+
+    Runs the same steps as scripts/orchestrator_multiagent.py and the frontend
+    useOrchestrator hook, but over the internal network and a pooled client.
+    """
+
+    def __init__(self, http, router_url: str, auditor_url: str, agent_urls: Dict[str, str]):
+        self.http = http  # PooledClient owned by the service lifespan
+        self.router_url = router_url
+        self.auditor_url = auditor_url
+        self.agent_urls = agent_urls
+
+    async def process_query(self, question: str, on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """Process a query through the complete flow and return the final markdown.
+
+        When `on_event` is given, a progress event is emitted as each stage
+        finishes, carrying elapsed time and cost so far.
+        """
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        state = {"cost": 0.0}
+        flow: Dict[str, Any] = {}
+
+        async def emit(event: str, data: Dict[str, Any]):
+            if on_event is None:
+                return
+            payload = {"elapsed": round(time.perf_counter() - start, 3), "cost_so_far": state["cost"]}
+            payload.update(data)
+            try:
+                await on_event(event, payload)
+            except Exception as e:
+                logger.error(f"Progress callback error: {str(e)}")
+
+        # Step 1: Route the query
+        step_start = time.perf_counter()
+        route_response = await self._call_router(question)
+        timings["routing"] = time.perf_counter() - step_start
+        state["cost"] += route_response.get("cost", 0)
+        flow["routing"] = route_response
+
+        agents, primary_agent = self._agents_from_decision(route_response.get("decision", {}))
+        await emit("routing", {
+            "agents": agents,
+            "primary_agent": primary_agent,
+            "confidence": route_response.get("decision", {}).get("confidence", 0.0),
+            "reason": route_response.get("decision", {}).get("reason", ""),
+            "duration": timings["routing"]
+        })
+
+        if not agents or primary_agent == "out_of_scope":
+            return {
+                "success": False,
+                "response": "Query out of scope",
+                "flow": flow,
+                "agents_consulted": [],
+                "total_cost": state["cost"],
+                "duration": time.perf_counter() - start,
+                "timings": timings
+            }
+
+        # Step 2: Multi-agent queries share one search instead of one per agent
+        context: Dict[str, Any] = {}
+        # What the shared search ran, reported once in the multi-agent audit
+        shared_search: Optional[Dict[str, Any]] = None
+        if len(agents) > 1:
+            step_start = time.perf_counter()
+            shared = await self._shared_search(primary_agent, agents, question)
+            timings["search"] = time.perf_counter() - step_start
+            state["cost"] += shared.get("cost", 0)
+            if shared.get("search_results"):
+                context["search_results"] = shared["search_results"]
+                shared_search = {
+                    "depths": shared.get("depths", []),
+                    "sources_consulted": shared["search_results"].get("sources_consulted", [])
+                }
+            await emit("search_shared", {
+                "agent": primary_agent,
+                "used": bool(context),
+                "count": len(shared.get("depths", [])),
+                "duration": timings["search"]
+            })
+
+        # Step 3: Call all selected agents in parallel
+        step_start = time.perf_counter()
+
+        async def call_and_report(agent_name: str) -> Dict[str, Any]:
+            agent_start = time.perf_counter()
+            if on_event is None:
+                response = await self._call_agent(agent_name, question, context)
+            else:
+                response = await self._call_agent_stream(agent_name, question, emit, context)
+            state["cost"] += response.get("cost", 0)
+            await emit("agent_answered", {
+                "agent": agent_name,
+                "error": response.get("error"),
+                "search": response.get("answer", {}).get("_search_metadata", {}),
+                "cascade": response.get("answer", {}).get("_cascade"),
+                "duration": time.perf_counter() - agent_start
+            })
+            return response
+
+        agent_responses_list = await asyncio.gather(
+            *[call_and_report(agent_name) for agent_name in agents]
+        )
+        timings["agents"] = time.perf_counter() - step_start
+
+        agent_responses = dict(zip(agents, agent_responses_list))
+        flow["agents"] = agent_responses
+
+        # Step 4: Audit (single or multi-agent)
+        step_start = time.perf_counter()
+        if len(agents) > 1:
+            audit_response = await self._call_auditor_multi(question, agent_responses, primary_agent, shared_search)
+        else:
+            audit_response = await self._call_auditor(question, agent_responses[agents[0]], agents[0])
+        timings["audit"] = time.perf_counter() - step_start
+        state["cost"] += audit_response.get("cost", 0)
+        flow["audit"] = audit_response
+        await emit("audit", {
+            "status": audit_response.get("status"),
+            "multi_agent": len(agents) > 1,
+            "duration": timings["audit"]
+        })
+
+        # Step 5: Format the response - rendered by the auditor in the audit call;
+        # /format is only needed for an auditor that predates ?render=markdown
+        step_start = time.perf_counter()
+        markdown = audit_response.get("markdown")
+        if markdown is None:
+            formatted = await self._format_response(audit_response)
+            markdown = formatted.get("markdown", "Error formatting response")
+        timings["format"] = time.perf_counter() - step_start
+        await emit("formatted", {"duration": timings["format"]})
+
+        return {
+            "success": True,
+            "response": markdown,
+            "flow": flow,
+            "agents_consulted": list(agents),
+            "total_cost": state["cost"],
+            "duration": time.perf_counter() - start,
+            "timings": timings
+        }
+
+    @staticmethod
+    def _agents_from_decision(decision: Dict[str, Any]):
+        """Extract (agents, primary_agent) handling both old and new router formats"""
+        agents: List[str] = decision.get("agents") or []
+        primary_agent = decision.get("primary_agent") or ""
+
+        if decision.get("agent") and not agents:
+            agents = [decision["agent"]] if decision["agent"] != "out_of_scope" else []
+            primary_agent = decision["agent"]
+
+        if agents and not primary_agent:
+            primary_agent = agents[0]
+        return agents, primary_agent
+
+    async def _call_router(self, question: str) -> Dict[str, Any]:
+        """Call the router service"""
+        response = await self.http.client.post(
+            f"{self.router_url}/route",
+            json={"question": question},
+            timeout=30.0
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _shared_search(self, agent_name: str, agents: List[str], question: str) -> Dict[str, Any]:
+        """Ask one agent to run a combined search for all `agents`; empty dict if unavailable"""
+        agent_url = self.agent_urls.get(agent_name)
+        if not agent_url:
+            return {}
+        try:
+            response = await self.http.client.post(
+                f"{agent_url}/search",
+                json={"question": question, "agents": agents},
+                timeout=60.0
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            # Agents fall back to searching on their own
+            logger.error(f"Shared search via {agent_name} failed: {str(e)}")
+            return {}
+        if (result.get("search_results") or {}).get("error"):
+            return {"depths": [], "cost": 0}
+        return result
+
+    async def _call_agent(self, agent_name: str, question: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Call a specific agent, returning an error answer instead of raising"""
+        agent_url = self.agent_urls.get(agent_name)
+        if not agent_url:
+            return {
+                "answer": {"error": f"Unknown agent {agent_name}"},
+                "agent": agent_name,
+                "cost": 0,
+                "error": "unknown agent"
+            }
+        try:
+            response = await self.http.client.post(
+                f"{agent_url}/answer",
+                json={"question": question, "context": context or {}},
+                timeout=60.0
+            )
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error calling {agent_name}: {str(e)}")
+            return {
+                "answer": {"error": f"Failed to contact {agent_name}"},
+                "agent": agent_name,
+                "cost": 0,
+                "error": str(e)
+            }
+
+    async def _call_agent_stream(self, agent_name: str, question: str, emit, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Call an agent's /answer/stream, forwarding its search and escalation events as progress"""
+        agent_url = self.agent_urls.get(agent_name)
+        if not agent_url:
+            return await self._call_agent(agent_name, question, context)
+        try:
+            result = None
+            event = None
+            async with self.http.client.stream(
+                "POST",
+                f"{agent_url}/answer/stream",
+                json={"question": question, "context": context or {}},
+                timeout=60.0
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:") and event in ("search_started", "search_finished", "escalated"):
+                        await emit(event, {"agent": agent_name, **json.loads(line[len("data:"):])})
+                    elif line.startswith("data:") and event == "answer":
+                        result = json.loads(line[len("data:"):])
+            if result is None:
+                raise ValueError("Stream ended without an answer event")
+            return result
+        except Exception as e:
+            logger.error(f"Error streaming from {agent_name}: {str(e)}")
+            return {
+                "answer": {"error": f"Failed to contact {agent_name}"},
+                "agent": agent_name,
+                "cost": 0,
+                "error": str(e)
+            }
+
+    async def _call_auditor(self, question: str, agent_response: Dict[str, Any], agent_name: str) -> Dict[str, Any]:
+        """Call the auditor service for a single agent"""
+        response = await self.http.client.post(
+            f"{self.auditor_url}/audit",
+            params={"render": "markdown"},
+            json={
+                "user_question": question,
+                "agent_response": agent_response.get("answer", {}),
+                "agent_name": agent_name
+            },
+            timeout=60.0
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _call_auditor_multi(
+        self,
+        question: str,
+        agent_responses: Dict[str, Dict[str, Any]],
+        primary_agent: str,
+        shared_search: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Call the auditor service with multiple agent responses (and the shared search they used, if any)"""
+        try:
+            response = await self.http.client.post(
+                f"{self.auditor_url}/audit-multi",
+                params={"render": "markdown"},
+                json={
+                    "user_question": question,
+                    "agent_responses": agent_responses,
+                    "primary_agent": primary_agent,
+                    "shared_search": shared_search
+                },
+                timeout=60.0
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            # Fallback to single agent audit for the primary agent only
+            logger.warning("Multi-agent audit not available, using primary agent only")
+            return await self._call_auditor(question, agent_responses.get(primary_agent, {}), primary_agent)
+
+    async def _format_response(self, audit_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Format the final response"""
+        response = await self.http.client.post(
+            f"{self.auditor_url}/format",
+            json=audit_response,
+            timeout=15.0
+        )
+        response.raise_for_status()
+        return response.json()
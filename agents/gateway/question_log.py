@@ -0,0 +1,46 @@
+"""Append-only log of the questions users ask, read back by scripts/warm_caches.py"""
+import json
+import logging
+import os
+import time
+from typing import Dict, Any, Optional
+from normalize import normalize_question
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionLog:
+    """One JSONL row per question asked: the text, its normalized cache key and a timestamp.
+
+    Off unless QUESTION_LOG_PATH is set. Write errors are logged and never fail
+    the request.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else os.getenv("QUESTION_LOG_PATH", "")
+        self.logged = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, question: str, cached: bool = False):
+        if not self.enabled:
+            return
+        row = {
+            "ts": round(time.time(), 3),
+            "question": question.strip(),
+            "normalized": normalize_question(question),
+            "cached": cached
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.logged += 1
+        except OSError as e:
+            self.errors += 1
+            logger.error(f"Question log write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "path": self.path or None, "logged": self.logged, "errors": self.errors}
@@ -1,38 +1,94 @@
 """Cost calculator for OpenRouter API usage"""
 
-# Pricing per million tokens (as of January 2025)
+# Pricing per million tokens (as of January 2025).
+# "cached_input" is what prompt tokens served from the provider's prompt cache cost.
 PRICING = {
     "openai/gpt-4o-mini": {
-        "input": 0.15,   # $0.15 per million tokens
-        "output": 0.60   # $0.60 per million tokens
+        "input": 0.15,         # $0.15 per million tokens
+        "cached_input": 0.075,  # 50% off for cached prompt prefixes
+        "output": 0.60         # $0.60 per million tokens
     },
     "openai/gpt-4o": {
-        "input": 5.00,   # $5.00 per million tokens
-        "output": 15.00  # $15.00 per million tokens
+        "input": 5.00,         # $5.00 per million tokens
+        "cached_input": 2.50,
+        "output": 15.00        # $15.00 per million tokens
+    },
+    "openai/gpt-4.1": {
+        "input": 2.00,         # $2.00 per million tokens
+        "cached_input": 0.50,   # 75% off for cached prompt prefixes
+        "output": 8.00         # $8.00 per million tokens
     },
     # Add more models as needed
 }
 
+# Tavily search pricing (as of January 2025)
+TAVILY_BASIC_COST = 0.004   # $0.004 per basic search (1 credit)
+TAVILY_SEARCH_COST = 0.015  # $0.015 per advanced search (2 credits)
+
+def _pricing(model: str) -> dict:
+    # Default to gpt-4o-mini pricing if model not found
+    return PRICING.get(model, PRICING["openai/gpt-4o-mini"])
+
+def cached_tokens(usage: dict) -> int:
+    """Prompt tokens served from the prompt cache.
+
+    OpenAI-style usage reports them in prompt_tokens_details.cached_tokens,
+    Anthropic-style usage in cache_read_input_tokens.
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+
 def calculate_cost(model: str, usage: dict) -> float:
     """
     Calculate cost based on model and usage data
-    
+
     Args:
         model: The model name (e.g., "openai/gpt-4o-mini")
-        usage: Usage dict with prompt_tokens and completion_tokens
-        
+        usage: Usage dict with prompt_tokens and completion_tokens, plus
+            cached-token fields when the provider reused a cached prompt prefix
+
     Returns:
         Cost in dollars
     """
-    if model not in PRICING:
-        # Default to gpt-4o-mini pricing if model not found
-        model = "openai/gpt-4o-mini"
-    
+    pricing = _pricing(model)
+
     prompt_tokens = usage.get("prompt_tokens", 0)
     completion_tokens = usage.get("completion_tokens", 0)
-    
+    cached = min(cached_tokens(usage), prompt_tokens)
+
     # Calculate cost (price is per million tokens)
-    input_cost = (prompt_tokens / 1_000_000) * PRICING[model]["input"]
-    output_cost = (completion_tokens / 1_000_000) * PRICING[model]["output"]
-    
-    return input_cost + output_cost
\ No newline at end of file
+    input_cost = ((prompt_tokens - cached) / 1_000_000) * pricing["input"]
+    cached_cost = (cached / 1_000_000) * pricing.get("cached_input", pricing["input"])
+    output_cost = (completion_tokens / 1_000_000) * pricing["output"]
+
+    return input_cost + cached_cost + output_cost
+
+def cache_savings(model: str, usage: dict) -> float:
+    """Dollars saved on this call by prompt caching"""
+    pricing = _pricing(model)
+    cached = min(cached_tokens(usage), usage.get("prompt_tokens", 0))
+    return (cached / 1_000_000) * (pricing["input"] - pricing.get("cached_input", pricing["input"]))
+
+class PromptCacheStats:
+    """Running totals of prompt-cache use for a service's /metrics"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.savings = 0.0
+
+    def record(self, model: str, usage: dict):
+        self.calls += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.cached_tokens += cached_tokens(usage)
+        self.savings += cache_savings(model, usage)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "savings": round(self.savings, 6)
+        }
@@ -0,0 +1,94 @@
+"""Local keyword classifier that routes obvious questions without calling the LLM"""
+import math
+import re
+from typing import Dict, Any, List, Optional
+from normalize import normalize_question
+from search_config import AGENT_SEARCH_CONFIG
+
+# Agency-specific jargon from prompt.md: one of these alone is a strong signal
+STRONG_TERMS = {
+    "bcra": [
+        "cepo", "mep", "ccl", "mulc", "sira", "sirase", "rofex", "comunicación a",
+        "normativa cambiaria", "mercado de cambios", "liquidación de divisas", "bcra"
+    ],
+    "comex": [
+        "arancel", "ncm", "simi", "djve", "reintegro", "aduana", "posición arancelaria",
+        "clasificación arancelaria", "derecho de exportación", "derecho de importación",
+        "certificado de origen", "despachante", "zona franca"
+    ],
+    "senasa": [
+        "fitosanitario", "zoosanitario", "roe", "senasa", "aftosa", "frigorífico",
+        "trazabilidad", "plaguicida", "sanidad animal", "sanidad vegetal"
+    ]
+}
+
+STRONG_WEIGHT = 2.0
+# Search triggers/keywords are broader ("pago", "exportación") and often shared
+GENERIC_WEIGHT = 0.5
+# Score at which confidence saturates; tuned on test_queries.md
+SCORE_SCALE = 1.0
+
+
+class KeywordRouter:
+    """Scores agents by weighted term hits over the normalized question.
+
+    All terms are compiled into one regex (accent-folded, word-bounded,
+    optional plural). Confidence is the share of score held by the top agent
+    times a saturating function of its absolute score, so a single strong
+    term scores ~0.86 while weak or mixed evidence stays well below it.
+    Router biases only rank the agents; confidence is always computed on the
+    unbiased scores so the calibration holds whatever the biases are.
+    """
+
+    def __init__(self, strong_terms: Dict[str, List[str]] = None, search_config: Dict[str, Any] = None):
+        strong_terms = strong_terms or STRONG_TERMS
+        search_config = search_config or AGENT_SEARCH_CONFIG
+
+        # normalized term -> {agent: weight}
+        self.weights: Dict[str, Dict[str, float]] = {}
+        for agent, config in search_config.items():
+            for term in config.get("triggers", []) + config.get("keywords", []):
+                self._add(term, agent, GENERIC_WEIGHT)
+        for agent, terms in strong_terms.items():
+            for term in terms:
+                self._add(term, agent, STRONG_WEIGHT)
+
+        alternation = "|".join(re.escape(t) for t in sorted(self.weights, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b({alternation})(?:e?s)?\b")
+
+    def _add(self, term: str, agent: str, weight: float):
+        key = normalize_question(term)
+        if not key:
+            return
+        agents = self.weights.setdefault(key, {})
+        agents[agent] = max(agents.get(agent, 0.0), weight)
+
+    def score(self, question: str) -> Dict[str, Any]:
+        """Return per-agent scores and the matched terms"""
+        matched = sorted(set(m.group(1) for m in self.pattern.finditer(normalize_question(question))))
+        scores: Dict[str, float] = {}
+        for term in matched:
+            for agent, weight in self.weights[term].items():
+                scores[agent] = scores.get(agent, 0.0) + weight
+        return {"scores": scores, "terms": matched}
+
+    def classify(self, question: str, biases: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Return a routing decision dict with a confidence in [0, 1]"""
+        result = self.score(question)
+        scores = result["scores"]
+        if not scores:
+            return {"agents": [], "primary_agent": "out_of_scope", "confidence": 0.0, "terms": []}
+
+        # Biases pick between agents; the chosen agent's raw evidence sets the confidence,
+        # so a bias that overrides the stronger match also lowers it
+        biases = biases or {}
+        primary = max(scores, key=lambda agent: (scores[agent] * biases.get(agent, 1.0), scores[agent]))
+        top = scores[primary]
+        exclusivity = top / sum(scores.values())
+        confidence = exclusivity * (1 - math.exp(-top / SCORE_SCALE))
+        return {
+            "agents": [primary],
+            "primary_agent": primary,
+            "confidence": round(confidence, 3),
+            "terms": result["terms"]
+        }
@@ -0,0 +1,118 @@
+"""Long-lived pooled HTTP client shared by all requests of a service"""
+import os
+import logging
+from typing import Dict, Any, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class PooledClient:
+    """Wraps one httpx.AsyncClient that is opened at startup and closed at shutdown.
+
+    Pool limits are read from environment variables prefixed with `env_prefix`:
+    <PREFIX>_MAX_CONNECTIONS, <PREFIX>_MAX_KEEPALIVE, <PREFIX>_KEEPALIVE_EXPIRY
+    and <PREFIX>_HTTP2 ("true"/"false").
+    """
+
+    def __init__(self, name: str, env_prefix: str, timeout: float = 30.0):
+        self.name = name
+        self.timeout = timeout
+        self.max_connections = _env_int(f"{env_prefix}_MAX_CONNECTIONS", 20)
+        self.max_keepalive = _env_int(f"{env_prefix}_MAX_KEEPALIVE", 10)
+        self.keepalive_expiry = _env_float(f"{env_prefix}_KEEPALIVE_EXPIRY", 60.0)
+        self.http2 = HTTP2_AVAILABLE and os.getenv(f"{env_prefix}_HTTP2", "true").lower() == "true"
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests_total = 0
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            event_hooks={"request": [self._on_request]}
+        )
+
+    async def start(self):
+        """Open the underlying client (idempotent)"""
+        if self._client is not None:
+            return
+        self._client = self._build_client()
+        logger.info(
+            f"HTTP pool '{self.name}' opened "
+            f"(max_connections={self.max_connections}, keepalive={self.max_keepalive}, http2={self.http2})"
+        )
+
+    async def close(self):
+        """Close the underlying client and drop all pooled connections"""
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info(f"HTTP pool '{self.name}' closed")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, opened lazily if used outside the lifespan (scripts, tests)"""
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests_total += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for the /metrics endpoint"""
+        stats = {
+            "name": self.name,
+            "open": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "requests_total": self.requests_total,
+            "connections": 0,
+            "connections_idle": 0,
+            "connections_active": 0,
+            "requests_waiting": 0
+        }
+        if self._client is None:
+            return stats
+
+        # httpx does not expose pool state publicly; read it from the httpcore pool
+        pool = getattr(self._client._transport, "_pool", None)
+        if pool is None:
+            return stats
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        stats["connections"] = len(connections)
+        stats["connections_idle"] = idle
+        stats["connections_active"] = len(connections) - idle
+        stats["requests_waiting"] = sum(
+            1 for r in getattr(pool, "_requests", []) if getattr(r, "connection", None) is None
+        )
+        return stats
@@ -6,12 +6,21 @@ import httpx
 import os
 import json
 import yaml
+import hashlib
+import time
 from typing import Dict, Any, List, Optional
 import logging
 import sys
 from datetime import datetime
+from contextlib import asynccontextmanager
 sys.path.append('/app')
-from cost_calculator import calculate_cost
+from cost_calculator import calculate_cost, PromptCacheStats
+from http_pool import PooledClient
+from resilient_client import ResilientClient
+from normalize import normalize_question
+from ttl_cache import TTLCache
+from fast_router import KeywordRouter
+from config_snapshot import WatchedFile
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,7 +29,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger("router")
 
-app = FastAPI(title="Router Service")
+# One keep-alive connection pool to OpenRouter per process
+openrouter = PooledClient("openrouter", env_prefix="OPENROUTER", timeout=30.0)
+# Retries, optional hedging and a circuit breaker for every completion request
+completions = ResilientClient(openrouter, env_prefix="OPENROUTER")
+# Cached prompt-prefix tokens and savings across LLM routing calls
+prompt_cache = PromptCacheStats()
+
+# Routing decisions for repeated questions, keyed on (config fingerprint, normalized question)
+route_cache = TTLCache(max_entries=int(os.getenv("ROUTER_CACHE_MAX_ENTRIES", "1000")))
+ROUTER_CACHE_TTL = float(os.getenv("ROUTER_CACHE_TTL", str(24 * 3600)))
+ROUTER_CACHE_ENABLED = os.getenv("ROUTER_CACHE_ENABLED", "true").lower() == "true"
+_route_cache_fingerprint = None
+
+# Local keyword classifier: confident decisions skip the LLM call
+fast_router = KeywordRouter()
+ROUTER_FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH_ENABLED", "true").lower() == "true"
+ROUTER_FAST_PATH_THRESHOLD = float(os.getenv("ROUTER_FAST_PATH_THRESHOLD", "0.85"))
+fast_path_stats = {"fast_path": 0, "llm": 0, "llm_latency_avg": 0.0, "latency_saved": 0.0}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await openrouter.start()
+    yield
+    await openrouter.close()
+
+app = FastAPI(title="Router Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,17 +78,23 @@ class RouteResponse(BaseModel):
     decision: RouteDecision
     agents_available: List[str]
     cost: float = 0.0
+    cached: bool = False
+    fast_path: bool = False
+
+# Fallback prompt if prompt.md is not mounted
+FALLBACK_PROMPT = """You are a routing agent for Argentine regulations.
+Available agents: bcra, comex, senasa.
+Route to ALL relevant agents."""
+
+# Config files are loaded once and hot-reloaded when they change on disk
+agents_file = WatchedFile("/app/agents.yml", parser=yaml.safe_load, default={})
+prompt_file = WatchedFile("/app/prompt.md", default=FALLBACK_PROMPT)
 
 # Load agents configuration
 def load_agents_config():
-    """Load agents configuration from agents.yml"""
-    try:
-        with open("/app/agents.yml", "r") as f:
-            config = yaml.safe_load(f)
-            return config.get("agents", [])
-    except Exception as e:
-        logger.error(f"Failed to load agents.yml: {e}")
-        return []
+    """Agents configuration from the current agents.yml snapshot"""
+    config = agents_file.value or {}
+    return config.get("agents", [])
 
 @app.get("/health")
 async def health():
@@ -66,6 +106,44 @@ async def health():
         "agents_configured": len(agents)
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Connection pool, cache, fast-path and prompt cache statistics"""
+    total = fast_path_stats["fast_path"] + fast_path_stats["llm"]
+    return {
+        "service": "router",
+        "http_pool": {"openrouter": openrouter.stats()},
+        "openrouter": completions.stats(),
+        "route_cache": {"enabled": ROUTER_CACHE_ENABLED, **route_cache.stats()},
+        "fast_path": {
+            "enabled": ROUTER_FAST_PATH_ENABLED,
+            "threshold": ROUTER_FAST_PATH_THRESHOLD,
+            "decisions": fast_path_stats["fast_path"],
+            "llm_calls": fast_path_stats["llm"],
+            "share": round(fast_path_stats["fast_path"] / total, 3) if total else 0.0,
+            "llm_latency_avg": round(fast_path_stats["llm_latency_avg"], 3),
+            "latency_saved": round(fast_path_stats["latency_saved"], 3)
+        },
+        "prompt_cache": prompt_cache.stats()
+    }
+
+def config_fingerprint(prompt_digest: str, agents_digest: str, agent_biases: Dict[str, float]) -> str:
+    """Hash of everything besides the question that influences a routing decision"""
+    material = json.dumps([prompt_digest, agents_digest, agent_biases], sort_keys=True)
+    return hashlib.md5(material.encode()).hexdigest()
+
+def cached_decision(fingerprint: str, question: str) -> Optional[RouteDecision]:
+    """Look up a cached decision, dropping the whole cache when the config changed"""
+    global _route_cache_fingerprint
+    if not ROUTER_CACHE_ENABLED:
+        return None
+    if fingerprint != _route_cache_fingerprint:
+        if _route_cache_fingerprint is not None:
+            logger.info("Routing config changed, clearing route cache")
+        route_cache.clear()
+        _route_cache_fingerprint = fingerprint
+    return route_cache.get(normalize_question(question))
+
 @app.post("/route", response_model=RouteResponse)
 async def route(request: RouteRequest):
     """Route query to appropriate agent(s)"""
@@ -87,14 +165,8 @@ async def route(request: RouteRequest):
     agent_names = [agent["slug"] for agent in agents]
     
     # Load routing prompt
-    try:
-        with open("/app/prompt.md", "r") as f:
-            base_prompt = f.read()
-    except:
-        # Fallback prompt if file not found
-        base_prompt = """You are a routing agent for Argentine regulations.
-Available agents: bcra, comex, senasa.
-Route to ALL relevant agents."""
+    prompt_snapshot = prompt_file.get()
+    base_prompt = prompt_snapshot.value
     
     # Agent bias adjustment (can be configured via env vars)
     agent_biases = {
@@ -107,90 +179,132 @@ Route to ALL relevant agents."""
     if any(bias != 1.0 for bias in agent_biases.values()):
         bias_note = f"\n\nBias adjustments: {agent_biases}"
     
-    routing_prompt = f"{base_prompt}{bias_note}\n\nQuestion: {request.question}"
+    # Static prompt first and the question in its own message, so the prompt is a
+    # stable prefix the provider's prompt cache can reuse across questions
+    routing_prompt = f"{base_prompt}{bias_note}"
+    
+    fingerprint = config_fingerprint(prompt_snapshot.digest, agents_file.get().digest, agent_biases)
+    cached = cached_decision(fingerprint, request.question)
+    if cached is not None:
+        logger.info(f"✓ Route cache hit: {cached.agents}")
+        return RouteResponse(
+            decision=cached,
+            agents_available=agent_names,
+            cost=0.0,
+            cached=True
+        )
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "HTTP-Referer": "https://github.com/bureaucracy-oracle",
-                    "X-Title": "Bureaucracy Oracle Router"
-                },
-                json={
-                    "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"),
-                    "messages": [
-                        {"role": "system", "content": routing_prompt}
-                    ],
-                    "temperature": 0.1,
-                    "response_format": {"type": "json_object"}
-                },
-                timeout=30.0
+    if ROUTER_FAST_PATH_ENABLED:
+        local = fast_router.classify(request.question, agent_biases)
+        if local["confidence"] >= ROUTER_FAST_PATH_THRESHOLD and local["primary_agent"] in agent_names:
+            fast_path_stats["fast_path"] += 1
+            fast_path_stats["latency_saved"] += fast_path_stats["llm_latency_avg"]
+            decision = RouteDecision(
+                agents=local["agents"],
+                primary_agent=local["primary_agent"],
+                reason=f"Clasificación local por términos: {', '.join(local['terms'])}",
+                confidence=local["confidence"]
             )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            # Calculate cost from usage data
-            usage = result.get("usage", {})
-            cost = calculate_cost(os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"), usage)
-            
-            # Parse routing decision
-            decision_data = json.loads(result["choices"][0]["message"]["content"])
-            
-            # Handle both old and new formats for backward compatibility
-            if "agent" in decision_data and "agents" not in decision_data:
-                # Old format - convert to new
-                agent = decision_data.get("agent")
-                if agent:
-                    agent = agent.lower()
-                    decision_data = {
-                        "agents": [agent] if agent != "out_of_scope" else [],
-                        "primary_agent": agent,
-                        "reason": decision_data.get("reason", ""),
-                        "confidence": decision_data.get("confidence", 0.8)
-                    }
-                else:
-                    # If agent is None, default to out_of_scope
-                    decision_data = {
-                        "agents": [],
-                        "primary_agent": "out_of_scope",
-                        "reason": decision_data.get("reason", "Invalid routing response"),
-                        "confidence": 0.0
-                    }
-            
-            # Ensure all agent names are lowercase (and not None)
-            if "agents" in decision_data and decision_data["agents"]:
-                decision_data["agents"] = [a.lower() for a in decision_data["agents"] if a]
-            if "primary_agent" in decision_data and decision_data["primary_agent"]:
-                decision_data["primary_agent"] = decision_data["primary_agent"].lower()
-            
-            # Ensure required fields exist
-            if "agents" not in decision_data:
-                decision_data["agents"] = []
-            if "primary_agent" not in decision_data:
-                decision_data["primary_agent"] = "out_of_scope"
-            if "reason" not in decision_data:
-                decision_data["reason"] = "No reason provided"
-            if "confidence" not in decision_data:
-                decision_data["confidence"] = 0.0
-            
-            decision = RouteDecision(**decision_data)
-            
-            # Log successful routing
-            logger.info(f"✓ Routing successful")
-            logger.info(f"  Agents: {decision.agents}")
-            logger.info(f"  Primary: {decision.primary_agent}")
-            logger.info(f"  Confidence: {decision.confidence}")
-            logger.info(f"  Cost: ${cost:.6f}")
-            
+            logger.info(f"✓ Fast-path routing: {decision.agents} (confidence {decision.confidence})")
             return RouteResponse(
                 decision=decision,
                 agents_available=agent_names,
-                cost=cost
+                cost=0.0,
+                fast_path=True
             )
-            
+    
+    try:
+        llm_start = time.perf_counter()
+        response = await completions.post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://github.com/bureaucracy-oracle",
+                "X-Title": "Bureaucracy Oracle Router"
+            },
+            json={
+                "model": os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"),
+                "messages": [
+                    {"role": "system", "content": routing_prompt},
+                    {"role": "user", "content": f"Question: {request.question}"}
+                ],
+                "temperature": 0.1,
+                "response_format": {"type": "json_object"}
+            },
+            timeout=30.0
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        # Running average of LLM routing latency, used to estimate time saved by the fast path
+        llm_latency = time.perf_counter() - llm_start
+        fast_path_stats["llm"] += 1
+        fast_path_stats["llm_latency_avg"] += (llm_latency - fast_path_stats["llm_latency_avg"]) / fast_path_stats["llm"]
+        
+        # Calculate cost from usage data
+        usage = result.get("usage", {})
+        cost = calculate_cost(os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"), usage)
+        prompt_cache.record(os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"), usage)
+        
+        # Parse routing decision
+        decision_data = json.loads(result["choices"][0]["message"]["content"])
+        
+        # Handle both old and new formats for backward compatibility
+        if "agent" in decision_data and "agents" not in decision_data:
+            # Old format - convert to new
+            agent = decision_data.get("agent")
+            if agent:
+                agent = agent.lower()
+                decision_data = {
+                    "agents": [agent] if agent != "out_of_scope" else [],
+                    "primary_agent": agent,
+                    "reason": decision_data.get("reason", ""),
+                    "confidence": decision_data.get("confidence", 0.8)
+                }
+            else:
+                # If agent is None, default to out_of_scope
+                decision_data = {
+                    "agents": [],
+                    "primary_agent": "out_of_scope",
+                    "reason": decision_data.get("reason", "Invalid routing response"),
+                    "confidence": 0.0
+                }
+        
+        # Ensure all agent names are lowercase (and not None)
+        if "agents" in decision_data and decision_data["agents"]:
+            decision_data["agents"] = [a.lower() for a in decision_data["agents"] if a]
+        if "primary_agent" in decision_data and decision_data["primary_agent"]:
+            decision_data["primary_agent"] = decision_data["primary_agent"].lower()
+        
+        # Ensure required fields exist
+        if "agents" not in decision_data:
+            decision_data["agents"] = []
+        if "primary_agent" not in decision_data:
+            decision_data["primary_agent"] = "out_of_scope"
+        if "reason" not in decision_data:
+            decision_data["reason"] = "No reason provided"
+        if "confidence" not in decision_data:
+            decision_data["confidence"] = 0.0
+        
+        decision = RouteDecision(**decision_data)
+        
+        # Log successful routing
+        logger.info(f"✓ Routing successful")
+        logger.info(f"  Agents: {decision.agents}")
+        logger.info(f"  Primary: {decision.primary_agent}")
+        logger.info(f"  Confidence: {decision.confidence}")
+        logger.info(f"  Cost: ${cost:.6f}")
+        
+        if ROUTER_CACHE_ENABLED:
+            route_cache.set(normalize_question(request.question), decision, ROUTER_CACHE_TTL)
+        
+        return RouteResponse(
+            decision=decision,
+            agents_available=agent_names,
+            cost=cost
+        )
+        
     except Exception as e:
         logger.error(f"Routing error: {type(e).__name__}: {str(e)}")
         
@@ -0,0 +1,83 @@
+"""Prompt/config files loaded once and hot-reloaded when they change on disk"""
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between mtime checks; edits show up within this window
+RELOAD_INTERVAL = float(os.getenv("CONFIG_RELOAD_INTERVAL", "5"))
+
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """Parsed file contents plus the digest/mtime they were loaded from. Treat `value` as read-only."""
+    value: Any
+    digest: str
+    mtime: float
+
+
+class WatchedFile:
+    """Holds the latest snapshot of a file and swaps it when the file changes.
+
+    `get()` stats the file at most every `check_interval` seconds; the file is
+    only re-read when its mtime changed, and only re-parsed when its content
+    hash changed. A failed reload keeps serving the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        parser: Optional[Callable[[str], Any]] = None,
+        default: Any = None,
+        check_interval: Optional[float] = None
+    ):
+        self.path = path
+        self.parser = parser
+        self.default = default
+        self.check_interval = RELOAD_INTERVAL if check_interval is None else check_interval
+        self._snapshot = FileSnapshot(value=default, digest="", mtime=0.0)
+        self._next_check = 0.0
+        self.reloads = 0
+        self._reload()
+
+    def get(self) -> FileSnapshot:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._reload()
+        return self._snapshot
+
+    @property
+    def value(self) -> Any:
+        return self.get().value
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            if self._snapshot.mtime:
+                logger.error(f"{self.path} disappeared, keeping last loaded version")
+            return
+        if mtime == self._snapshot.mtime:
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                text = f.read()
+            digest = hashlib.md5(text.encode()).hexdigest()
+            if digest == self._snapshot.digest:
+                self._snapshot = FileSnapshot(value=self._snapshot.value, digest=digest, mtime=mtime)
+                return
+            value = self.parser(text) if self.parser else text
+        except Exception as e:
+            logger.error(f"Failed to load {self.path}: {e}")
+            return
+
+        # Single assignment: readers see either the old or the new snapshot
+        self._snapshot = FileSnapshot(value=value, digest=digest, mtime=mtime)
+        self.reloads += 1
+        logger.info(f"Loaded {self.path} (digest {digest[:8]})")
@@ -1,16 +1,23 @@
 """Base template for all agent services"""
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import httpx
 import os
 import json
-from pathlib import Path
-from typing import Dict, Any, Optional
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
 import logging
 import sys
+from contextlib import asynccontextmanager
 sys.path.append('/app')
-from cost_calculator import calculate_cost, TAVILY_SEARCH_COST, TAVILY_BASIC_COST
+from cost_calculator import calculate_cost, TAVILY_SEARCH_COST, TAVILY_BASIC_COST, PromptCacheStats
+from http_pool import PooledClient
+from resilient_client import ResilientClient
+from config_snapshot import WatchedFile
+from context_budget import ContextStats, estimate_messages
 sys.path.append('/app/agents')
 try:
     from search_service import get_search_service
@@ -22,7 +29,32 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Agent Service")
+# One keep-alive connection pool to OpenRouter per process
+openrouter = PooledClient("openrouter", env_prefix="OPENROUTER", timeout=30.0)
+# Retries, optional hedging and a circuit breaker for every completion request
+completions = ResilientClient(openrouter, env_prefix="OPENROUTER")
+# Cached prompt-prefix tokens and savings across answers
+prompt_cache = PromptCacheStats()
+# Estimated vs. actual prompt tokens and how much search context was cut to fit
+context_stats = ContextStats()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await openrouter.start()
+    search_service = None
+    if get_search_service:
+        try:
+            search_service = get_search_service()
+            await search_service.start()
+        except Exception as e:
+            logger.error(f"Search service unavailable: {str(e)}")
+            search_service = None
+    yield
+    if search_service:
+        await search_service.close()
+    await openrouter.close()
+
+app = FastAPI(title="Agent Service", lifespan=lifespan)
 
 # CORS for frontend
 app.add_middleware(
@@ -37,6 +69,15 @@ class QueryRequest(BaseModel):
     question: str
     context: Dict[str, Any] = Field(default_factory=dict)
 
+class SearchRequest(BaseModel):
+    question: str
+    agents: List[str] = Field(default_factory=list)
+
+class SearchResponse(BaseModel):
+    search_results: Optional[Dict[str, Any]] = None
+    depths: List[str] = Field(default_factory=list)
+    cost: float = 0.0
+
 class QueryResponse(BaseModel):
     answer: Dict[str, Any]
     agent: str
@@ -58,129 +99,377 @@ async def health():
         model=os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
     )
 
-@app.post("/answer", response_model=QueryResponse)
-async def answer(query: QueryRequest):
-    """Process a query and return structured answer"""
-    agent_name = os.getenv("AGENT_NAME", "unknown")
-    model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
-    
-    # Load prompt
-    prompt_path = Path("prompt.md")
-    if not prompt_path.exists():
+@app.get("/metrics")
+async def metrics():
+    """Connection pool, search, search cache and prompt cache statistics"""
+    pools = {"openrouter": openrouter.stats()}
+    search_cache = None
+    search = None
+    if get_search_service:
+        try:
+            search_service = get_search_service()
+            pools["tavily"] = search_service.http.stats()
+            search_cache = search_service.cache.stats()
+            search = search_service.stats()
+            if search_service.index is not None:
+                search["local_index"] = search_service.index.stats()
+        except Exception:
+            pass
+    return {
+        "agent": os.getenv("AGENT_NAME", "unknown"),
+        "http_pool": pools,
+        "openrouter": completions.stats(),
+        "search_cache": search_cache,
+        "search": search,
+        "prompt_cache": prompt_cache.stats(),
+        "context": context_stats.stats(),
+        "cascade": {
+            "enabled": bool(CASCADE_MODEL),
+            "tiers": [os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini"), CASCADE_MODEL] if CASCADE_MODEL else [],
+            "min_confidence": CASCADE_MIN_CONFIDENCE,
+            "min_factor_ratio": CASCADE_MIN_FACTOR_RATIO,
+            **cascade_stats,
+            "tier1_hit_rate": round(cascade_stats["tier1"] / cascade_stats["answers"], 3) if cascade_stats["answers"] else 0.0,
+            "tier2_hit_rate": round(cascade_stats["tier2"] / cascade_stats["answers"], 3) if cascade_stats["answers"] else 0.0
+        }
+    }
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Hedged mode: if search hasn't finished after SEARCH_HEDGE_BUDGET seconds (0 = off), also start
+# the no-search answer; the search-enriched answer still wins if it is ready by SEARCH_HEDGE_DEADLINE.
+# /answer only: /answer/stream has already streamed tokens by the time a race could be decided
+SEARCH_HEDGE_BUDGET = float(os.getenv("SEARCH_HEDGE_BUDGET", "0"))
+SEARCH_HEDGE_DEADLINE = float(os.getenv("SEARCH_HEDGE_DEADLINE", "15"))
+
+# Model cascade: when CASCADE_MODEL is set, OPENROUTER_MODEL answers first and the question is
+# escalated to CASCADE_MODEL only if that answer is not valid JSON, its confidence is below
+# CASCADE_MIN_CONFIDENCE or fewer than CASCADE_MIN_FACTOR_RATIO of its has_* factors hold
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", "")
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7"))
+CASCADE_MIN_FACTOR_RATIO = float(os.getenv("CASCADE_MIN_FACTOR_RATIO", "0.5"))
+
+# Which tier answered, and why answers were escalated
+cascade_stats = {"answers": 0, "tier1": 0, "tier2": 0, "escalation_failed": 0, "reasons": {}}
+
+def openrouter_headers(api_key: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "HTTP-Referer": "https://github.com/bureaucracy-oracle",
+        "X-Title": "Bureaucracy Oracle"
+    }
+
+# System prompt loaded once and hot-reloaded when prompt.md changes
+prompt_file = WatchedFile("prompt.md")
+
+def load_prompt() -> str:
+    """Current agent system prompt"""
+    prompt = prompt_file.value
+    if prompt is None:
         raise HTTPException(status_code=500, detail="prompt.md not found")
-    
-    prompt = prompt_path.read_text()
-    
-    # Check if search is needed and enabled
+    return prompt
+
+def search_cost(search_results: Optional[Dict], searches: List[str]) -> float:
+    """Tavily cost of the searches issued ($0.004 basic, $0.015 advanced); failed searches are free"""
+    if not search_results or search_results.get("error"):
+        return 0.0
+    return issued_cost(searches)
+
+def issued_cost(searches: List[str]) -> float:
+    """Tavily cost of searches that were sent, whether or not their results were used"""
+    return sum(TAVILY_SEARCH_COST if depth == "advanced" else TAVILY_BASIC_COST for depth in searches)
+
+def shared_search_results(context: Dict[str, Any]) -> Optional[Dict]:
+    """Search results another service already fetched for this request, if usable"""
+    results = context.get("search_results")
+    if isinstance(results, dict) and not results.get("error") and results.get("sources"):
+        return results
+    return None
+
+async def run_search(question: str, agent_name: str, context: Optional[Dict[str, Any]] = None,
+                     issued: Optional[List[str]] = None):
+    """Run the web search stage. Returns (search_results, searches, search_service).
+
+    `searches` lists the Tavily depths actually issued; the planner issues one
+    search at the depth needs_search() picks (plus a basic fallback only when
+    the advanced search misses its deadline), and none when the search cache
+    or an identical in-flight search answers it. Results shared through the
+    request context are reused without searching (marked `shared`). Depths are appended to
+    `issued` as each search starts, so a caller that stops waiting still
+    knows what it paid for.
+    """
     search_results = None
-    search_count = 0
+    searches: List[str] = issued if issued is not None else []
+    search_service = None
     if get_search_service:
         try:
             search_service = get_search_service()
-            search_depth = search_service.needs_search(query.question, agent_name)
-            
-            if search_depth != "none":
-                # Always do a quick search first
-                logger.info(f"Quick search for: {query.question[:50]}...")
-                quick_results = await search_service.quick_search(query.question, agent_name)
-                search_results = quick_results
-                search_count = 1
-                
-                if search_depth == "full":
-                    # Upgrade to full search for priority topics
-                    logger.info(f"Upgrading to full search for: {query.question[:50]}...")
-                    full_results = await search_service.search(query.question, agent_name)
-                    search_results = full_results  # Use full results
-                    search_count = 2
-                
-                logger.info(f"Search completed with {len(search_results.get('sources', []))} sources")
+            shared = shared_search_results(context or {})
+            if shared is not None:
+                logger.info(f"Using {len(shared['sources'])} shared search sources")
+                return dict(shared, shared=True), searches, search_service
+            search_results, searches = await search_service.planned_search(question, agent_name, searches)
+            if search_results is not None:
+                logger.info(f"Search ({'+'.join(searches)}) completed with {len(search_results.get('sources', []))} sources")
         except Exception as e:
             logger.error(f"Search error: {str(e)}")
-    
-    # Prepare messages with optional search context
+    return search_results, searches, search_service
+
+def build_messages(question: str, prompt: str, search_results: Optional[Dict], search_service) -> List[Dict[str, str]]:
+    """Prepare messages with optional search context"""
     if search_results and not search_results.get("error"):
-        search_context = search_service.format_for_prompt(search_results)
-        enhanced_question = f"{query.question}\n\n{search_context}"
-        messages = [
+        search_context, assembled = search_service.assemble_context(search_results)
+        context_stats.assembled(assembled)
+        enhanced_question = f"{question}\n\n{search_context}"
+        return [
             {"role": "system", "content": prompt},
             {"role": "user", "content": enhanced_question}
         ]
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": question}
+    ]
+
+def build_answer(content: str, model: str, usage: Dict[str, Any], search_results: Optional[Dict], searches: List[str]):
+    """Parse the model output and attach search metadata. Returns (answer_content, total_cost)."""
+    # Calculate cost from usage data (cached prompt tokens are billed at the cached rate)
+    llm_cost = calculate_cost(model, usage)
+    prompt_cache.record(model, usage)
+    
+    # Add the cost of every search this agent issued
+    total_cost = llm_cost + search_cost(search_results, searches)
+    
+    # Parse the assistant's response
+    try:
+        answer_content = json.loads(content)
+    except json.JSONDecodeError:
+        # Fallback if response isn't valid JSON
+        answer_content = {
+            "response": content,
+            "error": "Response was not valid JSON"
+        }
+    
+    # Add search metadata if available
+    if search_results and not search_results.get("error"):
+        answer_content["_search_metadata"] = {
+            "used": True,
+            "count": len(searches),  # Track actual number of searches
+            "depths": searches,
+            "shared": bool(search_results.get("shared")),  # results came in the request context
+            "local_index": bool(search_results.get("local_index")),
+            # Served by the search cache or another request's in-flight search: nothing billed
+            "cached": not searches and not search_results.get("shared") and not search_results.get("local_index"),
+            "sources_consulted": search_results.get("sources_consulted", [])
+        }
     else:
-        messages = [
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": query.question}
-        ]
+        answer_content["_search_metadata"] = {
+            "used": False,
+            "count": 0,
+            "depths": [],
+            "shared": False,
+            "local_index": False,
+            "cached": False,
+            "sources_consulted": []
+        }
+    
+    return answer_content, total_cost
+
+async def complete(api_key: str, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """One JSON-mode chat completion; raises on HTTP errors"""
+    response = await completions.post(
+        OPENROUTER_URL,
+        headers=openrouter_headers(api_key),
+        json={
+            "model": model,
+            "messages": messages,
+            "temperature": 0.3,  # Balanced temperature for better instruction following
+            "response_format": {"type": "json_object"}  # Force JSON response
+        },
+        timeout=30.0
+    )
+    response.raise_for_status()
+    result = response.json()
+    context_stats.record("answer", estimate_messages(messages), result.get("usage", {}))
+    return result
+
+async def hedged_completion(query: QueryRequest, agent_name: str, prompt: str, api_key: str, model: str):
+    """Search then answer, hedged against slow searches.
+
+    Returns (result, search_results, searches, hedge) where `hedge` records
+    whether the no-search call was started, which answer won and the cost of
+    the work that was paid for but not used, including searches still running
+    when the no-search answer won.
+    """
+    start = time.perf_counter()
+    issued: List[str] = []
+    search_task = asyncio.ensure_future(run_search(query.question, agent_name, query.context, issued))
+    done, _ = await asyncio.wait({search_task}, timeout=SEARCH_HEDGE_BUDGET)
+    if done:
+        search_results, searches, search_service = search_task.result()
+        result = await complete(api_key, model, build_messages(query.question, prompt, search_results, search_service))
+        return result, search_results, searches, {
+            "budget": SEARCH_HEDGE_BUDGET,
+            "triggered": False,
+            "winner": "search",
+            "extra_cost": 0.0,
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
+    
+    logger.info(f"Search slower than {SEARCH_HEDGE_BUDGET}s, starting no-search answer")
+    plain = asyncio.ensure_future(complete(api_key, model, build_messages(query.question, prompt, None, None)))
+    
+    async def enriched():
+        search_results, searches, search_service = await search_task
+        return await complete(api_key, model, build_messages(query.question, prompt, search_results, search_service))
+    with_search = asyncio.ensure_future(enriched())
     
+    # Give the search-enriched answer until the deadline, then take whichever finishes first
+    remaining = max(0.0, SEARCH_HEDGE_DEADLINE - (time.perf_counter() - start))
+    await asyncio.wait({with_search}, timeout=remaining)
+    if not with_search.done() or with_search.exception():
+        await asyncio.wait({plain, with_search}, return_when=asyncio.FIRST_COMPLETED)
+    
+    if with_search.done() and not with_search.exception():
+        winner, loser = with_search, plain
+    elif plain.done() and not plain.exception():
+        winner, loser = plain, with_search
+    else:
+        # The finished call failed; the other one is all that's left
+        winner = with_search if plain.done() else plain
+        loser = plain if winner is with_search else with_search
+        await asyncio.wait({winner})
+    
+    # Paid-for but unused work: a completed losing call and, if search lost, the search itself
+    extra_cost = 0.0
+    if loser.done() and not loser.cancelled() and not loser.exception():
+        extra_cost += calculate_cost(model, loser.result().get("usage", {}))
+    loser.cancel()
+    
+    search_results, searches = None, []
+    if search_task.done() and not search_task.cancelled():
+        search_results, searches, _ = search_task.result()
+    if winner is plain:
+        if search_task.done():
+            extra_cost += search_cost(search_results, searches)
+        else:
+            # Cancelling the wait doesn't stop the shielded Tavily calls (they still fill the
+            # cache), so whatever was sent is billed
+            extra_cost += issued_cost(issued)
+        search_results, searches = None, []
+    
+    return winner.result(), search_results, searches, {
+        "budget": SEARCH_HEDGE_BUDGET,
+        "triggered": True,
+        "winner": "search" if winner is with_search else "no_search",
+        "extra_cost": round(extra_cost, 6),
+        "elapsed": round(time.perf_counter() - start, 3)
+    }
+
+def escalation_reason(content: str) -> Optional[str]:
+    """Why a first-tier answer should go to CASCADE_MODEL, or None to keep it"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "HTTP-Referer": "https://github.com/bureaucracy-oracle",
-                    "X-Title": "Bureaucracy Oracle"
-                },
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "temperature": 0.3,  # Balanced temperature for better instruction following
-                    "response_format": {"type": "json_object"}  # Force JSON response
-                },
-                timeout=30.0
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            # Calculate cost from usage data
-            usage = result.get("usage", {})
-            llm_cost = calculate_cost(model, usage)
-            
-            # Add search cost if search was performed
-            search_cost = 0.0
-            if search_results and not search_results.get("error"):
-                if search_count == 1:
-                    search_cost = TAVILY_BASIC_COST  # $0.004 for quick search only
-                elif search_count == 2:
-                    search_cost = TAVILY_BASIC_COST + TAVILY_SEARCH_COST  # $0.019 for both
-            
-            total_cost = llm_cost + search_cost
-            
-            # Parse the assistant's response
-            try:
-                answer_content = json.loads(result["choices"][0]["message"]["content"])
-            except json.JSONDecodeError:
-                # Fallback if response isn't valid JSON
-                answer_content = {
-                    "response": result["choices"][0]["message"]["content"],
-                    "error": "Response was not valid JSON"
-                }
-            
-            # Add search metadata if available
-            if search_results and not search_results.get("error"):
-                answer_content["_search_metadata"] = {
-                    "used": True,
-                    "count": search_count,  # Track actual number of searches
-                    "sources_consulted": search_results.get("sources_consulted", [])
-                }
-            else:
-                answer_content["_search_metadata"] = {
-                    "used": False,
-                    "count": 0,
-                    "sources_consulted": []
-                }
-            
-            return QueryResponse(
-                answer=answer_content,
-                agent=agent_name,
-                model=model,
-                cost=total_cost
+        answer = json.loads(content)
+    except json.JSONDecodeError:
+        return "invalid_json"
+    if not isinstance(answer, dict):
+        return "invalid_json"
+    confidence = answer.get("confidence")
+    if not isinstance(confidence, (int, float)) or confidence < CASCADE_MIN_CONFIDENCE:
+        return "low_confidence"
+    factors = answer.get("confidence_factors")
+    if factors is None:
+        factors = {}
+    elif not isinstance(factors, dict):
+        # A list or string can't be checked; treat it as missing evidence
+        return "weak_factors"
+    if factors.get("contains_insufficient_context"):
+        return "insufficient_context"
+    held = [bool(value) for name, value in factors.items() if name.startswith("has_")]
+    if held and sum(held) / len(held) < CASCADE_MIN_FACTOR_RATIO:
+        return "weak_factors"
+    return None
+
+async def cascade_completion(question: str, prompt: str, api_key: str, model: str,
+                             result: Dict[str, Any], search_results: Optional[Dict]):
+    """Keep the first-tier answer unless it looks unreliable, else ask CASCADE_MODEL with the same context.
+
+    Returns (result, answering_model, cascade) where `cascade` records the tier
+    that answered, why it escalated and the cost of the discarded first answer.
+    """
+    cascade_stats["answers"] += 1
+    reason = escalation_reason(result["choices"][0]["message"]["content"])
+    cascade = {"tier": 1, "model": model, "escalated": False, "reason": reason, "extra_cost": 0.0}
+    if reason is None:
+        cascade_stats["tier1"] += 1
+        return result, model, cascade
+    
+    cascade_stats["reasons"][reason] = cascade_stats["reasons"].get(reason, 0) + 1
+    logger.info(f"Escalating to {CASCADE_MODEL} ({reason})")
+    search_service = get_search_service() if search_results and get_search_service else None
+    try:
+        escalated = await complete(api_key, CASCADE_MODEL, build_messages(question, prompt, search_results, search_service))
+    except Exception as e:
+        # A weak answer beats none
+        logger.error(f"Escalation to {CASCADE_MODEL} failed, keeping {model} answer: {str(e)}")
+        cascade_stats["tier1"] += 1
+        cascade_stats["escalation_failed"] += 1
+        return result, model, cascade
+    
+    usage = result.get("usage", {})
+    prompt_cache.record(model, usage)
+    cascade_stats["tier2"] += 1
+    cascade.update(tier=2, model=CASCADE_MODEL, escalated=True, extra_cost=round(calculate_cost(model, usage), 6))
+    return escalated, CASCADE_MODEL, cascade
+
+@app.post("/answer", response_model=QueryResponse)
+async def answer(query: QueryRequest):
+    """Process a query and return structured answer"""
+    agent_name = os.getenv("AGENT_NAME", "unknown")
+    model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
+    
+    prompt = load_prompt()
+    
+    try:
+        if SEARCH_HEDGE_BUDGET > 0:
+            result, search_results, searches, hedge = await hedged_completion(query, agent_name, prompt, api_key, model)
+        else:
+            # Check if search is needed and enabled
+            search_results, searches, search_service = await run_search(query.question, agent_name, query.context)
+            messages = build_messages(query.question, prompt, search_results, search_service)
+            result = await complete(api_key, model, messages)
+            hedge = None
+        
+        answered_by, cascade = model, None
+        if CASCADE_MODEL:
+            result, answered_by, cascade = await cascade_completion(
+                query.question, prompt, api_key, model, result, search_results
             )
-            
+        
+        answer_content, total_cost = build_answer(
+            result["choices"][0]["message"]["content"],
+            answered_by,
+            result.get("usage", {}),
+            search_results,
+            searches
+        )
+        if hedge is not None:
+            answer_content["_search_metadata"]["hedge"] = hedge
+            total_cost += hedge["extra_cost"]
+        if cascade is not None:
+            answer_content["_cascade"] = cascade
+            total_cost += cascade["extra_cost"]
+        
+        return QueryResponse(
+            answer=answer_content,
+            agent=agent_name,
+            model=answered_by,
+            cost=total_cost
+        )
+        
     except httpx.HTTPStatusError as e:
         logger.error(f"OpenRouter API error: {e.response.text}")
         return QueryResponse(
@@ -198,6 +487,138 @@ async def answer(query: QueryRequest):
             error=str(e)
         )
 
+@app.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    """Run one search for a multi-agent query so every agent can reuse it via QueryRequest.context"""
+    agent_name = os.getenv("AGENT_NAME", "unknown")
+    if not get_search_service:
+        raise HTTPException(status_code=503, detail="Search service not available")
+    
+    try:
+        search_service = get_search_service()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Search service not available: {str(e)}")
+    
+    search_results, searches = await search_service.shared_search(request.question, request.agents or [agent_name])
+    return SearchResponse(
+        search_results=search_results,
+        depths=searches,
+        cost=search_cost(search_results, searches)
+    )
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/answer/stream")
+async def answer_stream(query: QueryRequest):
+    """Streaming variant of /answer: relays model deltas as Server-Sent Events.
+
+    Events: `search_started` / `search_finished` around the search stage, `delta`
+    for each content chunk and a final `answer` event carrying the same payload
+    as QueryResponse. With the model cascade on, an unreliable streamed answer is
+    followed by `escalated` and the final `answer` comes from CASCADE_MODEL
+    (not streamed). Search hedging (SEARCH_HEDGE_BUDGET) applies to /answer only.
+    """
+    agent_name = os.getenv("AGENT_NAME", "unknown")
+    model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
+    
+    prompt = load_prompt()
+    
+    async def event_stream():
+        yield sse_event("search_started", {})
+        search_results, searches, search_service = await run_search(query.question, agent_name, query.context)
+        yield sse_event("search_finished", {
+            "used": bool(search_results and not search_results.get("error")),
+            "count": len(searches)
+        })
+        messages = build_messages(query.question, prompt, search_results, search_service)
+        
+        chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+        try:
+            async with completions.stream(
+                "POST",
+                OPENROUTER_URL,
+                headers=openrouter_headers(api_key),
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0.3,
+                    "response_format": {"type": "json_object"},
+                    "stream": True,
+                    "stream_options": {"include_usage": True}  # Final chunk carries usage for cost
+                },
+                timeout=30.0
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta", {}).get("content")
+                        if delta:
+                            chunks.append(delta)
+                            yield sse_event("delta", {"content": delta})
+            
+            context_stats.record("answer", estimate_messages(messages), usage)
+            # Same shape as a non-streamed completion, for the cascade
+            result = {"choices": [{"message": {"content": "".join(chunks)}}], "usage": usage}
+            answered_by, cascade = model, None
+            if CASCADE_MODEL:
+                reason = escalation_reason(result["choices"][0]["message"]["content"])
+                if reason is not None:
+                    yield sse_event("escalated", {"reason": reason, "model": CASCADE_MODEL})
+                result, answered_by, cascade = await cascade_completion(
+                    query.question, prompt, api_key, model, result, search_results
+                )
+            
+            answer_content, total_cost = build_answer(
+                result["choices"][0]["message"]["content"],
+                answered_by,
+                result.get("usage", {}),
+                search_results,
+                searches
+            )
+            if cascade is not None:
+                answer_content["_cascade"] = cascade
+                total_cost += cascade["extra_cost"]
+            final = QueryResponse(answer=answer_content, agent=agent_name, model=answered_by, cost=total_cost)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"OpenRouter API error: {e.response.status_code}")
+            final = QueryResponse(
+                answer={"error": f"API error: {e.response.status_code}"},
+                agent=agent_name,
+                model=model,
+                error=str(e)
+            )
+        except Exception as e:
+            logger.error(f"Unexpected streaming error: {str(e)}")
+            final = QueryResponse(
+                answer={"error": "Internal error"},
+                agent=agent_name,
+                model=model,
+                error=str(e)
+            )
+        yield sse_event("answer", final.model_dump())
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -30,6 +30,10 @@ const agentUrls = {
   senasa: envSenasa && envSenasa.trim() !== '' ? envSenasa : `${baseHost}:8004`
 };
 
+// Optional gateway: runs route -> agents -> audit -> format server-side in one request
+const envGateway = import.meta.env.VITE_GATEWAY_URL;
+const GATEWAY_URL = envGateway && envGateway.trim() !== '' ? envGateway : '';
+
 interface FlowUpdate {
   currentStep: string;
   routing?: any;
@@ -65,6 +69,10 @@ export function useOrchestrator() {
     const startTime = Date.now(); // Track query start time
 
     try {
+      if (GATEWAY_URL) {
+        return await processViaGateway(question, startTime, onFlowUpdate);
+      }
+
       // Step 1: Route the query
       console.group('📍 Step 1: Routing Query');
       console.log('🎯 Target URL:', `${API_BASE_URL}/route`);
@@ -239,7 +247,7 @@ export function useOrchestrator() {
       if (agents.length > 1) {
         // Multi-agent audit
         try {
-          auditResponse = await axios.post(`${auditorUrl}/audit-multi`, {
+          auditResponse = await axios.post(`${auditorUrl}/audit-multi?render=markdown`, {
             user_question: question,
             agent_responses: agentResponses,
             primary_agent: primaryAgent
@@ -248,7 +256,7 @@ export function useOrchestrator() {
           if (error.response?.status === 404) {
             // Fallback to single agent audit for primary agent
             console.warn('Multi-agent audit not available, using primary agent only');
-            auditResponse = await axios.post(`${auditorUrl}/audit`, {
+            auditResponse = await axios.post(`${auditorUrl}/audit?render=markdown`, {
               user_question: question,
               agent_response: agentResponses[primaryAgent]?.answer || {},
               agent_name: primaryAgent
@@ -260,15 +268,20 @@ export function useOrchestrator() {
       } else {
         // Single agent audit
         const singleAgent = agents[0];
-        auditResponse = await axios.post(`${auditorUrl}/audit`, {
+        auditResponse = await axios.post(`${auditorUrl}/audit?render=markdown`, {
           user_question: question,
           agent_response: agentResponses[singleAgent]?.answer || {},
           agent_name: singleAgent
         }, { timeout: 30000 }); // 30 seconds timeout for single agent audit
       }
 
-      // Step 4: Format the response
-      const formatResponse = await axios.post(`${auditorUrl}/format`, auditResponse.data, { timeout: 15000 }); // 15 seconds timeout for formatting
+      // Step 4: Format the response - rendered by the auditor with ?render=markdown;
+      // /format is only needed for an auditor that predates that
+      let markdown: string = auditResponse.data.markdown;
+      if (markdown == null) {
+        const formatResponse = await axios.post(`${auditorUrl}/format`, auditResponse.data, { timeout: 15000 }); // 15 seconds timeout for formatting
+        markdown = formatResponse.data.markdown;
+      }
 
       onFlowUpdate?.({ 
         currentStep: 'complete',
@@ -290,12 +303,12 @@ export function useOrchestrator() {
       console.log('⏱️ Total duration:', duration.toFixed(2), 'seconds');
       console.log('💰 Total cost: $', totalCost.toFixed(6));
       console.log('🤖 Agents consulted:', agents);
-      console.log('📝 Response length:', formatResponse.data.markdown.length, 'characters');
+      console.log('📝 Response length:', markdown.length, 'characters');
       console.groupEnd();
 
       return {
         success: true,
-        response: formatResponse.data.markdown,
+        response: markdown,
         flow: {
           routing: routeResponse.data,
           agents: agentResponses,
@@ -382,4 +395,117 @@ export function useOrchestrator() {
     isLoading,
     error
   };
+}
+
+// Single round trip through the gateway, with stage progress from /ask/stream
+function streamGateway(
+  question: string,
+  onProgress: (event: string, data: any) => void
+): Promise<any> {
+  return new Promise((resolve, reject) => {
+    const url = `${GATEWAY_URL}/ask/stream?question=${encodeURIComponent(question)}`;
+    console.log('🎯 Target URL:', url);
+    const source = new EventSource(url);
+    const stages = ['routing', 'search_shared', 'search_started', 'search_finished', 'escalated', 'agent_answered', 'audit', 'formatted'];
+
+    stages.forEach((stage) => {
+      source.addEventListener(stage, (e) => onProgress(stage, JSON.parse((e as MessageEvent).data)));
+    });
+    source.addEventListener('result', (e) => {
+      source.close();
+      resolve(JSON.parse((e as MessageEvent).data));
+    });
+    source.addEventListener('error', (e) => {
+      source.close();
+      const data = (e as MessageEvent).data;
+      reject(new Error(data ? JSON.parse(data).detail : 'Gateway stream failed'));
+    });
+  });
+}
+
+async function processViaGateway(
+  question: string,
+  startTime: number,
+  onFlowUpdate?: (flow: FlowUpdate) => void
+) {
+  onFlowUpdate?.({ currentStep: 'router', processing: getAnalyzingQuery() });
+
+  let routing: any = {};
+  let agents: string[] = [];
+
+  const data = await streamGateway(question, (event, payload) => {
+    console.log(`📡 [gateway] ${event} at ${payload.elapsed}s, cost so far $${payload.cost_so_far}`, payload);
+
+    if (event === 'routing') {
+      agents = payload.agents || [];
+      routing = { ...payload, agents, primary_agent: payload.primary_agent };
+      if (!agents.length || payload.primary_agent === 'out_of_scope') return;
+
+      onFlowUpdate?.({
+        currentStep: 'router',
+        routing,
+        processing: agents.length > 1
+          ? getRoutingMultiple(agents.map((a: string) => a.toUpperCase()).join(', '))
+          : getRoutingSingle(payload.primary_agent),
+        stepData: { agents, primaryAgent: payload.primary_agent, confidence: payload.confidence }
+      });
+      onFlowUpdate?.({
+        currentStep: agents.length > 1 ? 'agents' : agents[0],
+        routing,
+        processing: agents.length > 1 ? getConsultingMultiple(agents.length.toString()) : getConsultingSingle(agents[0]),
+        stepData: agents.length > 1 ? { agentCount: agents.length, agents } : { agent: agents[0] }
+      });
+    } else if (event === 'agent_answered') {
+      onFlowUpdate?.({
+        currentStep: agents.length > 1 ? 'agents' : payload.agent,
+        routing,
+        processing: `✅ ${payload.agent.toUpperCase()} respondió`,
+        stepData: agents.length > 1 ? { agentCount: agents.length, agents } : { agent: payload.agent, completed: true }
+      });
+    } else if (event === 'audit') {
+      onFlowUpdate?.({
+        currentStep: 'auditor',
+        routing,
+        processing: agents.length > 1 ? getIntegratingResponses() : getValidatingResponse(),
+        stepData: { isMultiAgent: agents.length > 1, agentCount: agents.length }
+      });
+    }
+  });
+
+  const duration = (Date.now() - startTime) / 1000;
+  console.log('✅ Gateway response received in', duration.toFixed(2), 's', data.timings);
+
+  if (!data.success) {
+    if (routing.reason && routing.reason.toLowerCase().includes('api key')) {
+      console.error('🚨 API KEY ERROR DETECTED! Reason from server:', routing.reason);
+      return {
+        success: false,
+        response: `❌ ERROR: API Key inválida o bloqueada. Revisa la consola para instrucciones.`,
+        totalCost: data.total_cost || 0,
+        duration
+      };
+    }
+    return {
+      success: false,
+      response: `❌ ${getOutOfScope()}`,
+      totalCost: data.total_cost || 0,
+      duration
+    };
+  }
+
+  onFlowUpdate?.({
+    currentStep: 'complete',
+    routing,
+    complete: true,
+    stepData: { finished: true }
+  });
+
+  return {
+    success: true,
+    response: data.response,
+    flow: data.flow,
+    agentsConsulted: data.agents_consulted,
+    totalCost: data.total_cost || 0,
+    duration
+  };
 }
\ No newline at end of file
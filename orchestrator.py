@@ -53,12 +53,15 @@ class BureaucracyOracle:
             "result": audit_response
         })
         
-        # Step 4: Format the response
-        formatted = await self._format_response(audit_response)
+        # Step 4: Format the response (the auditor renders it with ?render=markdown;
+        # /format is only needed for an auditor that predates that)
+        markdown = audit_response.get("markdown")
+        if markdown is None:
+            markdown = (await self._format_response(audit_response))["markdown"]
         
         return {
             "success": True,
-            "response": formatted["markdown"],
+            "response": markdown,
             "flow": flow_data,
             "total_cost": self.total_cost
         }
@@ -100,6 +103,7 @@ class BureaucracyOracle:
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.auditor_url}/audit",
+                params={"render": "markdown"},
                 json={
                     "user_question": question,
                     "agent_response": agent_response.get("answer", {}),
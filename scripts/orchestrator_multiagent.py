@@ -75,12 +75,16 @@ class BureaucracyOracle:
             "result": audit_response
         })
         
-        # Step 4: Format the response
-        formatted = await self._format_response(audit_response)
+        # Step 4: Format the response (the auditor renders it with ?render=markdown;
+        # /format is only needed for an auditor that predates that)
+        markdown = audit_response.get("markdown")
+        if markdown is None:
+            formatted = await self._format_response(audit_response)
+            markdown = formatted.get("markdown", "Error formatting response")
         
         return {
             "success": True,
-            "response": formatted.get("markdown", "Error formatting response"),
+            "response": markdown,
             "flow": flow_data,
             "total_cost": self.total_cost,
             "agents_consulted": list(agents)
@@ -139,6 +143,7 @@ class BureaucracyOracle:
             try:
                 response = await client.post(
                     f"{self.auditor_url}/audit-multi",
+                    params={"render": "markdown"},
                     json={
                         "user_question": question,
                         "agent_responses": agent_responses,
@@ -156,6 +161,7 @@ class BureaucracyOracle:
                     primary_response = agent_responses.get(primary_agent, {})
                     response = await client.post(
                         f"{self.auditor_url}/audit",
+                        params={"render": "markdown"},
                         json={
                             "user_question": question,
                             "agent_response": primary_response.get("answer", {}),
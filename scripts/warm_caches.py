@@ -0,0 +1,179 @@
+"""Warm the router, search and answer caches after a deploy by asking the frequent questions"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, Any, List, Optional
+import httpx
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+sys.path.insert(0, os.path.join(ROOT, "agents", "gateway"))
+from normalize import normalize_question  # noqa: E402
+
+# Questions logged by the gateway (QUESTION_LOG_PATH, mounted at ./logs by docker-compose)
+DEFAULT_QUESTION_LOG = os.path.join(ROOT, "logs", "questions.jsonl")
+
+QUESTION_SOURCES = {
+    "test_queries": os.path.join(ROOT, "test_queries.md"),
+    "example_grid": os.path.join(ROOT, "frontend", "src", "components", "ExampleGrid.tsx"),
+    "suggestion_bar": os.path.join(ROOT, "frontend", "src", "components", "SuggestionBar.tsx")
+}
+
+# Service ports as published by docker-compose.yml
+PORTS = {"router": 8001, "bcra": 8002, "comex": 8003, "senasa": 8004, "gateway": 8006}
+
+
+def read_jsonl_questions(path: str) -> List[str]:
+    """`question` (or `query`) field of every JSONL row that has one"""
+    questions = []
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(row, dict):
+                continue
+            question = row.get("question") or row.get("query")
+            if question:
+                questions.append(question)
+    return questions
+
+
+def read_markdown_questions(path: str) -> List[str]:
+    """Numbered questions ("1. ¿...?") from a markdown file"""
+    with open(path) as f:
+        return re.findall(r"^\s*\d+\.\s+(.+?\?)\s*$", f.read(), re.MULTILINE)
+
+
+def read_example_questions(path: str) -> List[str]:
+    """`query: "..."` examples from a frontend component"""
+    with open(path) as f:
+        return re.findall(r'query:\s*"([^"]+)"', f.read())
+
+
+def collect_questions(question_log: str = DEFAULT_QUESTION_LOG, limit: Optional[int] = None) -> List[str]:
+    """Questions from the gateway's question log and the bundled examples, most frequent first.
+
+    Questions are counted by their normalized form (the answer cache key); each
+    is asked in its most common wording.
+    """
+    readers = {
+        "question_log": read_jsonl_questions,
+        "test_queries": read_markdown_questions,
+        "example_grid": read_example_questions,
+        "suggestion_bar": read_example_questions
+    }
+    sources = dict(QUESTION_SOURCES, question_log=question_log)
+    counts: Counter = Counter()
+    wordings: Dict[str, Counter] = {}
+    for name, path in sources.items():
+        if not os.path.exists(path):
+            if name == "question_log":
+                print(f"⚠️  question log {path} not found")
+            continue
+        found = readers[name](path)
+        print(f"📄 {name}: {len(found)} questions")
+        for question in found:
+            key = normalize_question(question)
+            if not key:
+                continue
+            counts[key] += 1
+            wordings.setdefault(key, Counter())[question.strip()] += 1
+    return [wordings[key].most_common(1)[0][0] for key, _ in counts.most_common(limit)]
+
+
+async def cache_sizes(client: httpx.AsyncClient, base_url: str) -> Dict[str, int]:
+    """Entries currently held by each cache, read from the services' /metrics"""
+    sizes = {"router": 0, "search": 0, "answer": 0}
+    shared_search_caches = set()
+    for service, port in PORTS.items():
+        try:
+            response = await client.get(f"{base_url}:{port}/metrics", timeout=5.0)
+            response.raise_for_status()
+            metrics = response.json()
+        except Exception:
+            continue
+        if service == "router":
+            sizes["router"] += (metrics.get("route_cache") or {}).get("size", 0)
+        elif service == "gateway":
+            sizes["answer"] += (metrics.get("answer_cache") or {}).get("size", 0)
+        else:
+            search_cache = metrics.get("search_cache") or {}
+            # A SQLite cache is shared by all agents; count it once
+            if search_cache.get("path") in shared_search_caches:
+                continue
+            if search_cache.get("path"):
+                shared_search_caches.add(search_cache["path"])
+            sizes["search"] += search_cache.get("size", 0)
+    return sizes
+
+
+async def warm(questions: List[str], base_url: str, concurrency: int, max_cost: float) -> Dict[str, Any]:
+    """Ask every question through the gateway, at most `concurrency` at a time, until `max_cost` is spent"""
+    semaphore = asyncio.Semaphore(concurrency)
+    state = {"cost": 0.0, "asked": 0, "already_cached": 0, "failed": 0, "skipped": 0}
+
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        before = await cache_sizes(client, base_url)
+
+        async def ask(question: str):
+            async with semaphore:
+                # Checked after acquiring the slot so in-flight answers count toward the cap
+                if state["cost"] >= max_cost:
+                    state["skipped"] += 1
+                    return
+                try:
+                    # Flagged so the gateway doesn't log it and inflate the next ranking
+                    response = await client.post(f"{base_url}:{PORTS['gateway']}/ask",
+                                                 json={"question": question, "warmup": True})
+                    response.raise_for_status()
+                    result = response.json()
+                except Exception as e:
+                    state["failed"] += 1
+                    print(f"❌ {question[:60]}: {str(e)}")
+                    return
+                state["asked"] += 1
+                state["cost"] += result.get("total_cost", 0)
+                if result.get("cached"):
+                    state["already_cached"] += 1
+                print(f"{'♻️ ' if result.get('cached') else '🔥'} ${result.get('total_cost', 0):.4f} "
+                      f"{result.get('duration', 0):5.1f}s {question[:60]}")
+
+        await asyncio.gather(*[ask(question) for question in questions])
+        after = await cache_sizes(client, base_url)
+
+    state["warmed"] = {cache: max(0, after[cache] - before[cache]) for cache in after}
+    return state
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Warm the Bureaucracy Oracle caches")
+    parser.add_argument("--base-url", default="http://localhost", help="Host the services are published on")
+    parser.add_argument("--concurrency", type=int, default=3, help="Questions in flight at once")
+    parser.add_argument("--max-cost", type=float, default=1.0, help="Stop starting new questions after this many USD")
+    parser.add_argument("--limit", type=int, default=None, help="Only the N most frequent questions")
+    parser.add_argument("--question-log", default=DEFAULT_QUESTION_LOG,
+                        help="JSONL question log written by the gateway")
+    args = parser.parse_args()
+
+    questions = collect_questions(args.question_log, args.limit)
+    print(f"\n🔥 Warming caches with {len(questions)} questions "
+          f"(concurrency {args.concurrency}, cost cap ${args.max_cost:.2f})\n")
+
+    result = await warm(questions, args.base_url, args.concurrency, args.max_cost)
+
+    print("\n" + "=" * 60)
+    print(f"Asked: {result['asked']}  already cached: {result['already_cached']}  "
+          f"failed: {result['failed']}  skipped (cost cap): {result['skipped']}")
+    print(f"Warmed entries - router: {result['warmed']['router']}, "
+          f"search: {result['warmed']['search']}, answer: {result['warmed']['answer']}")
+    print(f"Total cost: ${result['cost']:.4f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Check the prompt context budgets (offline)"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from context_budget import ContextAssembler, estimate_tokens, fit_json, truncate_to_tokens  # noqa: E402
+
+ANSWER = {
+    "Respuesta": "El límite mensual para la compra de dólares para ahorro es de USD 200 por persona. " * 20,
+    "Normativa": [{"tipo": "Com. A", "número": "7105", "punto": "2.1", "año": "2019"}],
+    "Requisitos": [f"Requisito {i}" for i in range(30)],
+    "confidence": 0.85,
+    "confidence_factors": {"has_specific_communications": True},
+    "_search_metadata": {"used": True, "sources_consulted": ["https://www.bcra.gob.ar"]}
+}
+
+
+def test_truncate_fits_budget():
+    text = "Resolución General 5271/2022 de AFIP sobre percepciones " * 10
+    assert estimate_tokens(truncate_to_tokens(text, 30)) <= 30
+    assert truncate_to_tokens("corto", 30) == "corto"
+
+
+def test_assembler_keeps_priorities_and_order():
+    context = ContextAssembler(budget=25)
+    context.add("HEADER", required=True)
+    context.add("low priority " * 20, priority=10)
+    context.add("trimmable section " * 20, priority=50, min_tokens=5)
+    context.add("FOOTER", required=True)
+    text = context.render()
+    assert text.startswith("HEADER") and text.endswith("FOOTER")
+    assert "trimmable" in text and "low priority" not in text
+    assert context.stats()["dropped"] == 1 and context.stats()["trimmed"] == 1
+    assert estimate_tokens(text) <= 25
+
+
+def test_fit_json_trims_but_keeps_audit_fields():
+    dump = fit_json(ANSWER, 150)
+    assert estimate_tokens(dump) <= 150
+    trimmed = json.loads(dump)
+    assert "_search_metadata" not in trimmed
+    assert trimmed["Normativa"] == ANSWER["Normativa"]
+    assert trimmed["confidence_factors"] == ANSWER["confidence_factors"]
+    # The caller's answer is left untouched
+    assert len(ANSWER["Requisitos"]) == 30
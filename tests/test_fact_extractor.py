@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Check and benchmark the search fact extractor against recorded Tavily results (offline)"""
+import json
+import os
+import re
+import sys
+import timeit
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from fact_extractor import extract_facts  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "tavily_results.jsonl")
+
+
+def load_documents(path: str = CORPUS):
+    """(text, url) for every result in a JSONL file of raw Tavily responses"""
+    documents = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                for result in json.loads(line).get("results", []):
+                    documents.append((f"{result.get('title', '')} {result.get('content', '')}", result.get("url", "")))
+    return documents
+
+
+def legacy_extract(text: str, url: str):
+    """The per-call regex passes search_service used before fact_extractor"""
+    return {
+        "domain": urlparse(url).netloc,
+        "normas": re.findall(r'(?:Resolución|Comunicación|Decreto|NCM)\s*(?:N°|Nº|A)?\s*[\d\./-]+', text),
+        "percentages": re.findall(r'\d+(?:\.\d+)?%', text),
+        "amounts": re.findall(r'(?:USD?\s*)?(?:\$\s*)?\d+(?:\.\d+)?', text),
+        "usd_amounts": re.findall(r'USD?\s*(\d+(?:\.\d+)?)', text)
+    }
+
+
+def test_extractor_matches_legacy_patterns():
+    """Regulations and percentages agree with the old patterns; USD amounts also accept US$"""
+    for text, url in load_documents():
+        facts = extract_facts(text, url)
+        legacy = legacy_extract(text, url)
+        assert facts["domain"] == legacy["domain"]
+        assert [n["text"] for n in facts["normas"]] == list(dict.fromkeys(legacy["normas"]))
+        assert facts["percentages"] == list(dict.fromkeys(legacy["percentages"]))
+        assert set(legacy["usd_amounts"]) <= set(facts["usd_amounts"])
+
+
+def test_amounts_exclude_regulation_numbers_and_percentages():
+    """Unlike the old pattern, `amounts` skips digits of regulations and percentages and drops repeats.
+
+    This changes when search_service's `len(amounts) <= 5` key_facts gate fires,
+    so pin it: the result equals the old pattern run with those tokens removed.
+    """
+    for text, url in load_documents():
+        stripped = re.sub(r'\d+(?:\.\d+)?%', ' ', re.sub(
+            r'(?:Resolución|Comunicación|Decreto|NCM)\s*(?:N°|Nº|A)?\s*[\d\./-]+', ' ', text))
+        expected = list(dict.fromkeys(re.findall(r'(?:USD?\s*)?(?:\$\s*)?\d+(?:\.\d+)?', stripped)))
+        assert extract_facts(text, url)["amounts"] == expected
+
+    text = "Decreto 123/2024: 10% o 20% de USD 500, tope USD 500"
+    assert legacy_extract(text, "")["amounts"] == ["123", "2024", "10", "20", "USD 500", "USD 500"]
+    assert extract_facts(text)["amounts"] == ["USD 500"]
+
+
+def test_extractor_structured_hits():
+    facts = extract_facts("La Comunicación A 7030 fija 35% y un tope de USD 200", "https://www.bcra.gob.ar/x")
+    assert facts["domain"] == "www.bcra.gob.ar"
+    assert facts["normas"] == [{"type": "Comunicación", "number": "7030", "text": "Comunicación A 7030"}]
+    assert facts["percentages"] == ["35%"]
+    assert facts["amounts"] == ["USD 200"]
+    assert facts["usd_amounts"] == ["200"]
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else CORPUS
+    documents = load_documents(path)
+    rounds = int(os.getenv("BENCH_ROUNDS", "2000"))
+
+    def run(extract):
+        for text, url in documents:
+            extract(text, url)
+
+    print(f"🧪 Fact extractor benchmark ({len(documents)} documents x {rounds} rounds)")
+    print("=" * 60)
+    results = {}
+    for name, extract in (("legacy", legacy_extract), ("fact_extractor", extract_facts)):
+        seconds = min(timeit.repeat(lambda: run(extract), number=rounds, repeat=3))
+        results[name] = seconds / (rounds * len(documents)) * 1e6
+        print(f"{name:16} {results[name]:8.2f} µs/document")
+    print("=" * 60)
+    print(f"Speedup: {results['legacy'] / results['fact_extractor']:.2f}x")
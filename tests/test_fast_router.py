@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Check the router's local fast-path classifier against labelled test queries (offline)"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents", "router"))
+from fast_router import KeywordRouter  # noqa: E402
+
+THRESHOLD = float(os.getenv("ROUTER_FAST_PATH_THRESHOLD", "0.85"))
+# ROUTER_BIAS_* defaults from docker-compose.yml
+COMPOSE_BIASES = {"bcra": 1.2, "comex": 0.9, "senasa": 1.0}
+
+# (question, acceptable primary agents) - from test_queries.md and docs/test_queries.md
+LABELLED_QUERIES = [
+    ("¿Cuál es el límite mensual para comprar dólares?", {"bcra"}),
+    ("¿Cómo pago un servicio de AWS desde Argentina?", {"bcra"}),
+    ("¿Cómo compro dólar MEP?", {"bcra"}),
+    ("¿Qué dice la Comunicación A 7030 sobre importaciones?", {"bcra"}),
+    ("¿Puedo pagar Netflix desde Argentina?", {"bcra"}),
+    ("¿Qué arancel paga la importación de smartphones?", {"comex"}),
+    ("¿Cuál es el arancel para importar celulares?", {"comex"}),
+    ("¿Cuál es la posición arancelaria NCM del vino?", {"comex"}),
+    ("¿Necesito licencia para exportar software?", {"comex"}),
+    ("¿Cuáles son los requisitos fitosanitarios para importar semillas?", {"senasa"}),
+    ("¿Cuáles son los requisitos sanitarios para un frigorífico?", {"senasa"}),
+    ("¿Cómo me inscribo en el ROE verde?", {"senasa", "comex"}),
+    ("¿Qué certificados necesito para exportar carne a Brasil?", {"senasa"}),
+    ("¿Puedo importar alimentos desde USA y cuánto puedo gastar en dólares?", {"senasa", "comex", "bcra"}),
+    ("¿Qué impuestos pago al importar insumos agrícolas y pagar con tarjeta?", {"comex", "bcra"}),
+    # Out of scope: must never take the fast path
+    ("¿Cuál es el precio del dólar blue hoy?", set()),
+    ("¿Cómo está el clima en Buenos Aires?", set()),
+    ("¿Qué impuestos paga un monotributista?", set()),
+    ("¿Cómo registro una marca?", set()),
+]
+
+
+def test_fast_router_precision():
+    """Every fast-path decision above the threshold must pick an acceptable agent"""
+    router = KeywordRouter()
+    fast = 0
+    for question, expected in LABELLED_QUERIES:
+        decision = router.classify(question)
+        if decision["confidence"] >= THRESHOLD:
+            fast += 1
+            assert decision["primary_agent"] in expected, f"{question!r} -> {decision}"
+    assert fast > 0
+
+
+def test_biases_do_not_shift_confidence():
+    """The compose biases only rank agents: a single strong term still takes the fast path for every agent"""
+    router = KeywordRouter()
+    for question, agent in [("¿Qué es el SIMI?", "comex"), ("¿Cómo consulto el NCM?", "comex"),
+                            ("¿Qué es el cepo?", "bcra"), ("¿Qué hace SENASA?", "senasa")]:
+        plain = router.classify(question)
+        biased = router.classify(question, COMPOSE_BIASES)
+        assert biased["primary_agent"] == agent
+        assert biased["confidence"] == plain["confidence"] >= THRESHOLD
+    for question, expected in LABELLED_QUERIES:
+        decision = router.classify(question, COMPOSE_BIASES)
+        if decision["confidence"] >= THRESHOLD:
+            assert decision["primary_agent"] in expected, f"{question!r} -> {decision}"
+
+
+if __name__ == "__main__":
+    router = KeywordRouter()
+    fast = correct = 0
+    print(f"🧪 Fast-path router (threshold {THRESHOLD})")
+    print("=" * 60)
+    for question, expected in LABELLED_QUERIES:
+        decision = router.classify(question)
+        taken = decision["confidence"] >= THRESHOLD
+        ok = decision["primary_agent"] in expected
+        fast += taken
+        correct += taken and ok
+        marker = ("✅" if ok else "❌") if taken else "↪ LLM"
+        print(f"{marker:6} {decision['confidence']:.2f} {decision['primary_agent']:12} {question}")
+    print("=" * 60)
+    print(f"Fast path: {fast}/{len(LABELLED_QUERIES)} queries, precision {correct}/{fast}")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Check the auditor's markdown rendering without the service (offline)"""
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents", "auditor"))
+from formatter import render_markdown, search_label  # noqa: E402
+
+
+def audit_response(**metadata):
+    return SimpleNamespace(
+        respuesta_final=SimpleNamespace(
+            titulo="🎯 Límite de compra de dólares",
+            respuesta_directa="✅ El límite es de USD 200 mensuales.",
+            detalles=["📌 No recibir subsidios"],
+            normativa_aplicable=["📋 Com. A 7105, punto 2.1 (2019)"],
+            proxima_accion="👉 Consultá con tu banco",
+            advertencias=None
+        ),
+        metadata=metadata
+    )
+
+
+def test_renders_sections_and_footer():
+    markdown = render_markdown(audit_response(agente_consultado="bcra", busquedas_web=1,
+                                              profundidades_busqueda=["basic"], confianza=0.95))
+    assert markdown.startswith("🎯 Límite de compra de dólares\n✅ El límite")
+    assert "**Normativa Aplicable:**\n📋 Com. A 7105" in markdown
+    assert "*Consultado: BCRA* | 🔍 *1 búsqueda rápida*" in markdown
+    assert markdown.endswith("*Confianza: 95%*")
+
+
+def test_renders_confidence_breakdown_below_95():
+    breakdown = {"base": {"achieved": 50, "possible": 50}, "specific_regulations": {"achieved": 0, "possible": 20}}
+    markdown = render_markdown(audit_response(agentes_consultados=["comex", "senasa"], confianza=0.5,
+                                              confidence_breakdown=breakdown))
+    assert "*Consultado: COMEX, SENASA*" in markdown
+    assert "Regulaciones específicas: 0 / 20 ✗" in markdown
+
+
+def test_search_label_follows_depths():
+    assert search_label(0, []) == "Sin búsquedas web"
+    assert search_label(1, ["advanced"]) == "1 búsqueda completa"
+    assert search_label(2, ["advanced", "basic"]) == "2 búsquedas (completa + rápida)"
+    assert search_label(3, ["advanced", "advanced", "basic"]) == "3 búsquedas (2 completas + 1 rápida)"
+    # Agents that don't report depths
+    assert search_label(2, []) == "2 búsquedas web"
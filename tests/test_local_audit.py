@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Check the auditor's deterministic fast path on answers shaped like the agents' prompt examples (offline)"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents", "auditor"))
+from local_audit import build_audit, check_answer  # noqa: E402
+
+SENASA_ANSWER = {
+    "Respuesta": "La exportación de carne vacuna requiere faena en establecimientos habilitados por SENASA "
+                 "e inspección veterinaria ante y post mortem. Debe emitirse el certificado sanitario "
+                 "internacional [Resolución SENASA 32/2023, art. 4; Decreto 4238/68].",
+    "Normativa": [{"tipo": "Resolución", "número": "32/2023", "artículo": "4", "año": "2023"},
+                  {"tipo": "Decreto", "número": "4238/68", "artículo": "10", "año": "1968"}],
+    "RequisitosSanitarios": ["Faena en establecimiento habilitado", "Inspección veterinaria"],
+    "CertificadosRequeridos": ["Certificado sanitario internacional"],
+    "PlazoProcesamiento": "48-72 horas hábiles",
+    "confidence": 0.85,
+    "confidence_factors": {
+        "has_specific_regulations": True,
+        "has_exact_articles": True,
+        "has_complete_procedures": True,
+        "has_recent_updates": True,
+        "contains_insufficient_context": False
+    }
+}
+
+BCRA_ANSWER = {
+    "Respuesta": "El límite mensual para la compra de dólares para ahorro es de USD 200 por persona "
+                 "[Com. 'A' 7105, punto 2.1].",
+    "Normativa": [{"tipo": "Com. A", "número": "7105", "punto": "2.1", "año": "2019"}],
+    "Requisitos": ["No recibir subsidios"],
+    "MontoLimite": "USD 200 mensuales",
+    "confidence": 0.85,
+    "confidence_factors": {
+        "has_specific_communications": True,
+        "has_exact_points": True,
+        "has_complete_requirements": True,
+        "has_recent_updates": False,
+        "contains_insufficient_context": False
+    }
+}
+
+
+def test_well_cited_answers_pass():
+    assert check_answer(SENASA_ANSWER) == []
+    assert check_answer(BCRA_ANSWER) == []
+
+
+def test_failing_answers_name_their_checks():
+    assert check_answer({"response": "texto", "error": "Response was not valid JSON"}) == ["schema"]
+    assert "low_confidence" in check_answer({**BCRA_ANSWER, "confidence": 0.5})
+    assert "missing_citation" in check_answer({**BCRA_ANSWER, "Respuesta": "El límite es de USD 200 por persona por mes."})
+    bad_norma = [{"tipo": "Circular", "número": "siete", "año": "2019"}]
+    assert "citation_format" in check_answer({**BCRA_ANSWER, "Normativa": bad_norma})
+    other_norma = [{"tipo": "Com. A", "número": "7500", "año": "2023"}]
+    assert "citation_mismatch" in check_answer({**BCRA_ANSWER, "Normativa": other_norma})
+    factors = {**SENASA_ANSWER["confidence_factors"], "contains_insufficient_context": True}
+    assert "confidence_factors" in check_answer({**SENASA_ANSWER, "confidence_factors": factors})
+
+
+def test_local_audit_reshapes_the_answer():
+    audit = build_audit("¿Qué requisitos tiene la exportación de carne vacuna?", SENASA_ANSWER, "senasa")
+    final = audit["respuesta_final"]
+    assert audit["status"] == "Aprobado"
+    assert final["titulo"] == "🎯 Qué requisitos tiene la exportación de carne vacuna"
+    assert "[" not in final["respuesta_directa"]
+    assert "📋 Resolución 32/2023, art. 4" in final["normativa_aplicable"][0]
+    assert final["proxima_accion"] == "👉 Primer paso: Faena en establecimiento habilitado"
+    assert audit["metadata"]["confianza"] == 0.85
+    assert audit["metadata"]["confidence_breakdown"]["exact_articles"] == {"achieved": 15, "possible": 15}
+    # BCRA's answer reports no recent updates, which becomes a warning
+    assert build_audit("¿Límite de dólares?", BCRA_ANSWER, "bcra")["respuesta_final"]["advertencias"]
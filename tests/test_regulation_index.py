@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Check the local regulation index against recorded Tavily results (offline)"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from regulation_index import RegulationIndex  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "tavily_results.jsonl")
+
+
+def build_index(path: str) -> RegulationIndex:
+    index = RegulationIndex(path)
+    with open(CORPUS) as f:
+        for line in f:
+            index.ingest(json.loads(line), "comex+senasa")
+    return index
+
+
+def test_lookup_answers_covered_questions(tmp_path):
+    index = build_index(str(tmp_path / "index.db"))
+    raw = index.lookup("¿Cuál es el arancel para importar celulares?", "comex")
+    assert raw is not None
+    assert any("celulares" in result["title"] for result in raw["results"])
+
+
+def test_lookup_falls_back_when_recall_is_insufficient(tmp_path):
+    index = build_index(str(tmp_path / "index.db"))
+    assert index.lookup("¿Cómo está el clima en Buenos Aires?", "comex") is None
+    # Pages are only returned to the agents that searched for them
+    assert index.lookup("¿Cuál es el arancel para importar celulares?", "bcra") is None
+
+
+def test_ingest_upserts_by_url(tmp_path):
+    path = str(tmp_path / "index.db")
+    index = build_index(path)
+    documents = index.stats()["documents"]
+    with open(CORPUS) as f:
+        index.ingest(json.loads(f.readline()), "bcra")
+    reopened = RegulationIndex(path, min_hits=1)
+    assert reopened.stats()["documents"] == documents
+    # The page is now tagged for both the old and the new agents
+    assert reopened.lookup("personas humanas en el mercado de cambios", "bcra") is not None
+    assert reopened.lookup("personas humanas en el mercado de cambios", "comex") is not None
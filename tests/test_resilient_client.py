@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Check OpenRouter retries, hedging and the circuit breaker against a mock transport (offline)"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from http_pool import PooledClient  # noqa: E402
+from resilient_client import CircuitOpenError, ResilientClient  # noqa: E402
+
+URL = "https://openrouter.test/v1/chat/completions"
+
+
+def make_client(monkeypatch, handler, **env) -> ResilientClient:
+    monkeypatch.setenv("TEST_BACKOFF_BASE", "0.001")
+    for name, value in env.items():
+        monkeypatch.setenv(f"TEST_{name}", value)
+    pool = PooledClient("test", env_prefix="TEST")
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return ResilientClient(pool, env_prefix="TEST")
+
+
+def test_retries_honor_retry_after(monkeypatch):
+    statuses = iter([429, 503, 200])
+
+    def handler(request):
+        return httpx.Response(next(statuses), headers={"Retry-After": "0"})
+
+    client = make_client(monkeypatch, handler)
+    response = asyncio.run(client.post(URL, json={}))
+    assert response.status_code == 200
+    assert client.stats()["retries"] == 2
+
+
+def test_long_retry_after_is_not_waited_for(monkeypatch):
+    client = make_client(monkeypatch, lambda request: httpx.Response(429, headers={"Retry-After": "120"}))
+    assert asyncio.run(client.post(URL, json={})).status_code == 429
+    assert client.stats()["retries"] == 0
+
+
+def test_breaker_opens_and_fails_fast(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    client = make_client(monkeypatch, handler, MAX_RETRIES="0", BREAKER_THRESHOLD="2")
+    for _ in range(2):
+        assert asyncio.run(client.post(URL, json={})).status_code == 502
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.post(URL, json={}))
+    assert len(calls) == 2
+    assert client.stats()["breaker"]["state"] == "open"
+
+
+def test_slow_request_is_hedged(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        # The first call hangs; the hedged duplicate answers at once
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={"ok": True})
+
+    client = make_client(monkeypatch, handler, HEDGE="true", HEDGE_MIN_DELAY="0.05")
+    client.latencies.extend([0.01] * 20)
+    response = asyncio.run(client.post(URL, json={}))
+    assert response.json() == {"ok": True}
+    assert client.stats()["hedges"] == 1 and client.stats()["hedge_wins"] == 1
+
+
+def test_cancelled_half_open_trial_frees_the_slot(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 2:
+            # The trial hangs until it is cancelled
+            await asyncio.sleep(5)
+        return httpx.Response(502 if len(calls) == 1 else 200)
+
+    client = make_client(monkeypatch, handler, MAX_RETRIES="0", BREAKER_THRESHOLD="1", BREAKER_RESET="0")
+
+    async def scenario():
+        assert (await client.post(URL, json={})).status_code == 502
+        trial = asyncio.ensure_future(client.post(URL, json={}))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # The next call becomes the new trial instead of being rejected as half-open
+        return await client.post(URL, json={})
+
+    assert asyncio.run(scenario()).status_code == 200
+    assert client.stats()["breaker"]["state"] == "closed"
+
+
+def test_stale_half_open_trial_times_out(monkeypatch):
+    client = make_client(monkeypatch, lambda request: httpx.Response(200), BREAKER_RESET="0", BREAKER_TRIAL_TIMEOUT="0")
+    client.breaker.opened_at = 0.0
+    client.breaker.trial_in_flight = True
+    client.breaker.trial_started = 0.0
+    assert asyncio.run(client.post(URL, json={})).status_code == 200
+    assert client.stats()["breaker"]["state"] == "closed"
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Check the shared SQLite search cache degrades to a miss when the database is locked (offline)"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from search_service import SQLiteSearchCache  # noqa: E402
+
+
+def test_locked_database_is_a_miss_and_skips_writes(tmp_path):
+    path = str(tmp_path / "search_cache.db")
+    cache = SQLiteSearchCache(path)
+    cache.set("tipo de cambio", "bcra", {"results": [1]})
+    cache.db.close()
+    cache.db = sqlite3.connect(path, timeout=0.05, isolation_level=None, check_same_thread=False)
+
+    # Another container holds the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.get("tipo de cambio", "bcra") is None
+        cache.set("arancel", "comex", {"results": [2]})
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert cache.stats()["errors"] == 2
+    assert cache.get("tipo de cambio", "bcra") == {"results": [1]}
+    assert cache.get("arancel", "comex") is None
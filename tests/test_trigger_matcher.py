@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Check the search trigger matcher built from search_config (offline)"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+from trigger_matcher import build_search_triggers  # noqa: E402
+
+MATCHER = build_search_triggers()
+
+
+def test_unaccented_variants_fire():
+    assert MATCHER.match("¿Cuál es el límite?") == MATCHER.match("cual es el limite")
+    assert "bcra" in MATCHER.match("cotizacion del dolar")
+
+
+def test_stems_and_longer_terms_fire_all_categories():
+    fired = MATCHER.match("Requisitos de importación")
+    assert set(fired) == {"priority", "comex", "senasa"}
+
+
+def test_terms_match_at_word_start_only():
+    assert MATCHER.match("un héroe") == {}
+    assert MATCHER.match("¿Qué tal?") == {}
+
+
+if __name__ == "__main__":
+    for question in sys.argv[1:] or ["¿Cuál es el límite para comprar dólares hoy?"]:
+        print(f"{question} -> {MATCHER.match(question)}")